@@ -0,0 +1,598 @@
+"""
+Benchmarks for every task module on generated instance families.
+
+Each task directory is a set of scripts importing their siblings by bare
+name, so the modules are loaded by path under unique names
+(``t4_main``, ``t5_mst``, ...) with the task directory on ``sys.path``.
+
+For every instance and engine the build, solve and extract phases are
+timed separately (median over ``--repeat`` runs) and the peak Python heap
+allocated inside the phases is measured with tracemalloc in one extra run.
+Memory allocated by native solvers (HiGHS, CBC subprocess) is not visible
+to tracemalloc. The solution cache (utils/cache.py) is switched off unless
+``--cache`` is given, otherwise repeats would only time cache hits.
+A suite may name a ``reference`` engine: when it runs, every other engine
+on the same instance must reach its objective, or the run stops.
+Results go to a JSON file:
+
+    python benchmark.py --size small --output benchmark.json
+    python benchmark.py --suite maxflow production --repeat 5
+"""
+import argparse
+import importlib.util
+import json
+import platform
+import sys
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+from utils import cache
+
+
+def load(task, module):
+    """Imports ``<task>/<module>.py`` as ``<task>_<module>``."""
+    name = f'{task}_{module}'
+    if name in sys.modules:
+        return sys.modules[name]
+    directory = str(ROOT / task)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, ROOT / task / f'{module}.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class Run:
+    """Phase timer handed to an engine; optionally tracks peak traced memory."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}
+        self.peak = 0
+
+    @contextmanager
+    def phase(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+            if self.memory:
+                self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - base)
+
+
+# ---------------------------------------------------------------- t1: transport
+
+def transport_instance(m, n, seed):
+    generator = load('t1', 'data_generator')
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = str(Path(directory) / 'transport')
+        generator.generate(prefix, m, n, seed=seed)
+        data = generator.load(prefix, mmap=False)
+    return np.asarray(data['matrix'], dtype=float), data['inputs'].astype(float), data['outputs'].astype(float)
+
+
+def transport_modi(start):
+    def engine(run, instance):
+        transport = load('t1', 'transport')
+        cost, supply, demand = instance
+        with run.phase('build'):
+            if start == 'vogel':
+                X, basis = transport.vogel(cost, supply, demand)
+            else:
+                X, basis = transport.northwest_corner(supply, demand)
+        with run.phase('solve'):
+            X = transport.modi(cost, X, basis)
+        with run.phase('extract'):
+            plan = [[int(round(x)) for x in row] for row in X]
+        return float((cost * np.array(plan)).sum())
+    return engine
+
+
+def transport_lp(run, instance):
+    from scipy.optimize import linprog
+    transport = load('t1', 'transport')
+    cost, supply, demand = instance
+    m, n = cost.shape
+    with run.phase('build'):
+        A = transport.constraint_matrix(m, n)
+        b = np.concatenate((supply, demand))
+    with run.phase('solve'):
+        res = linprog(cost.ravel(), A_eq=A, b_eq=b, bounds=(0, None), method='highs')
+    with run.phase('extract'):
+        plan = [[int(round(x)) for x in row] for row in res.x.reshape(m, n)]
+    return float((cost * np.array(plan)).sum())
+
+
+def transport_batch_instance(B, m, n, seed):
+    return load('t1', 'data_generator').generate_batch(B, m, n, seed=seed)
+
+
+def transport_batch(method, start='vogel'):
+    def engine(run, instance):
+        transport = load('t1', 'transport')
+        cost, supply, demand = instance
+        with run.phase('solve'):
+            X, costs = transport.solve_transport_batch(cost, supply, demand, start, method)
+        return float(costs.sum())
+    return engine
+
+
+def transport_loop(run, instance):
+    transport = load('t1', 'transport')
+    cost, supply, demand = instance
+    with run.phase('solve'):
+        total = sum(transport.solve_transport(cost[k], supply[k], demand[k])[1] for k in range(len(cost)))
+    return float(total)
+
+
+# ----------------------------------------------------------------- t2: max flow
+
+def maxflow_instance(N, density, seed):
+    data_io = load('t2', 'data_io')
+    inputs = outputs = max(1, N // 20)
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = str(Path(directory) / 'flow')
+        data_io.generate(prefix, N, density, inputs, outputs, seed=seed)
+        n, edges, meta = data_io.load(prefix, mmap=False)
+    return n, edges, meta['sources'], meta['sinks']
+
+
+def maxflow_single_terminal(instance):
+    # the single source/sink engines get a super-source (node n) and a
+    # super-sink (node n + 1) whose edges carry the total capacity leaving
+    # every source / entering every sink; returns (nodes, edges, s, t)
+    n, edges, sources, sinks = instance
+    out = np.bincount(edges[:, 0], weights=edges[:, 2], minlength=n).astype(edges.dtype)
+    into = np.bincount(edges[:, 1], weights=edges[:, 2], minlength=n).astype(edges.dtype)
+    super_edges = np.concatenate((
+        np.stack((np.full(len(sources), n), sources, out[sources]), axis=1),
+        np.stack((sinks, np.full(len(sinks), n + 1), into[sinks]), axis=1),
+    )).astype(edges.dtype)
+    return n + 2, np.concatenate((edges, super_edges)), n, n + 1
+
+
+def maxflow_network(method):
+    def engine(run, instance):
+        flow = load('t2', 'flow')
+        n, edges, s, t = maxflow_single_terminal(instance)
+        with run.phase('build'):
+            network = flow.FlowNetwork(n, edges[:, 0], edges[:, 1], edges[:, 2])
+        with run.phase('solve'):
+            value = network.max_flow(s, t, method)
+        with run.phase('extract'):
+            network.edge_flows()
+        return value
+    return engine
+
+
+def maxflow_multi_terminal(method):
+    # sources and sinks handled natively; nodes off every source-sink path
+    # are pruned before the network is built
+    def engine(run, instance):
+        flow = load('t2', 'flow')
+        n, edges, sources, sinks = instance
+        with run.phase('build'):
+            network = flow.MultiTerminalFlow(n, edges[:, 0], edges[:, 1], edges[:, 2], sources, sinks)
+        with run.phase('solve'):
+            value = network.max_flow(method)
+        with run.phase('extract'):
+            network.edge_flows()
+        return value
+    return engine
+
+
+def maxflow_min_cost(run, instance):
+    flow = load('t2', 'flow')
+    n, edges, s, t = maxflow_single_terminal(instance)
+    costs = np.random.default_rng(len(edges)).integers(1, 10, len(edges))
+    with run.phase('build'):
+        network = flow.MinCostFlowNetwork(n, edges[:, 0], edges[:, 1], edges[:, 2], costs)
+    with run.phase('solve'):
+        value, _ = network.min_cost_flow(s, t)
+    with run.phase('extract'):
+        network.edge_flows()
+    return value
+
+
+def maxflow_ford_fulkerson(run, instance):
+    main = load('t2', 'main')
+    n, edges, s, t = maxflow_single_terminal(instance)
+    # Graph.FordFulkerson goes from node 0 to the last node: swap the
+    # super-source in for node 0
+    order = np.arange(n)
+    order[[0, s]] = order[[s, 0]]
+    with run.phase('build'):
+        arr = [[0] * n for _ in range(n)]
+        for i, j, capacity in edges.tolist():
+            arr[order[i]][order[j]] = capacity
+        graph = main.Graph(arr)
+    with run.phase('solve'):
+        value, residual = graph.FordFulkerson()
+    with run.phase('extract'):
+        [[arr[i][j] - residual[i][j] for j in range(n)] for i in range(n)]
+    return value
+
+
+def maxflow_legacy_instance(N, density, seed):
+    # older data.json layout: super-source 0 and super-sink N + 1 with finite
+    # capacities, a direct 0 -> N + 1 edge and nodes that are fed by the
+    # super-source and feed the super-sink at the same time
+    rng = np.random.default_rng(seed)
+    n = N + 2
+    arr = np.where(rng.random((n, n)) < density, rng.integers(1, 21, (n, n)), 0)
+    np.fill_diagonal(arr, 0)
+    arr[:, 0] = 0
+    arr[n - 1] = 0
+    arr[0, n - 1] = rng.integers(1, 21)
+    return {
+        'arr': arr.tolist(),
+        'cost': rng.integers(0, 10, (n, n)).tolist(),
+        'names': [str(i) for i in range(n)],
+        'inputs': int((arr[0] > 0).sum()),
+        'outputs': int((arr[:, n - 1] > 0).sum()),
+    }
+
+
+def maxflow_legacy(method):
+    def engine(run, data):
+        main = load('t2', 'main')
+        with run.phase('solve'):
+            if method == 'min-cost':
+                return main.solve_min_cost(data)[2]
+            return main.solve(data, method)[2]
+    return engine
+
+
+# ------------------------------------------------------ t3: production-transport
+
+def production_instance(nodes, K, seed, L=3, density=0.1):
+    rng = np.random.default_rng(seed)
+    d = np.where(rng.random((nodes, nodes)) < density, rng.integers(5, 60, (nodes, nodes)), 0).astype(float)
+    np.fill_diagonal(d, 0)
+    c = d * rng.random((nodes, nodes)) * 0.8
+    consumers = {f'consumer{i}': int(i) for i in rng.choice(np.arange(1, nodes), max(1, nodes // 3), replace=False)}
+    Q = {name: {k: int(rng.integers(0, 40)) for k in range(K) if rng.random() < 0.7} for name in consumers}
+    p = rng.integers(3, 20, K).tolist()
+    b = rng.integers(50, 50 * K, L).tolist()
+    A = rng.integers(0, 4, (L, K)).tolist()
+    return p, b, A, d, Q, c, list(range(nodes)), 0, consumers
+
+
+def production_assembled(builder):
+    def engine(run, instance):
+        from scipy.optimize import linprog
+        assembly = load('t3', 'assembly')
+        results = load('t3', 'results')
+        p, b, A, d, Q, c, nodes, source_node, consumers = instance
+        with run.phase('build'):
+            c_obj, A_ub, b_ub, A_eq, b_eq = getattr(assembly, builder)(p, b, A, d, Q, c, len(nodes),
+                                                                        source_node, consumers)
+        with run.phase('solve'):
+            res = linprog(c=c_obj, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+        with run.phase('extract'):
+            result = results.collect_results(res.message, -res.fun, res.x, p, b, A, d, Q, nodes, consumers)
+        return result['total_profit']
+    return engine
+
+
+def production_warm(run, instance):
+    warm_model = load('t3', 'warm_model')
+    with run.phase('build'):
+        model = warm_model.ProductionTransportModel(*instance)
+    with run.phase('solve'):
+        result = model.solve()
+    return result['total_profit']
+
+
+def production_colgen(run, instance):
+    decomposition = load('t3', 'decomposition')
+    with run.phase('solve'):
+        result = decomposition.optimize_production_transport_colgen(*instance)
+    return result['total_profit']
+
+
+# ------------------------------------------------------ t4: multi-day MILP
+
+def milp_instance(K, L, N, M, seed):
+    return load('t4', 'main').generate_params(K, L, N, M, seed=seed)
+
+
+def milp_matrix(run, params):
+    from scipy.optimize import milp
+    matrix_model = load('t4', 'matrix_model')
+    with run.phase('build'):
+        objective, constraints, integrality, bounds = matrix_model.build_matrix(params)
+    with run.phase('solve'):
+        res = milp(objective, constraints=constraints, integrality=integrality, bounds=bounds)
+    with run.phase('extract'):
+        matrix_model.unpack(res.x, params)
+    return -res.fun
+
+
+def milp_pulp(run, params):
+    import pulp
+    from utils.solver_control import SolverControl
+    main = load('t4', 'main')
+    with run.phase('build'):
+        model, x, u, z, b = main.build_model(params)
+    with run.phase('solve'):
+        SolverControl().solve(model)
+    with run.phase('extract'):
+        {name: {key: var.varValue for key, var in variables.items()}
+         for name, variables in (('x', x), ('u', u), ('z', z), ('b', b))}
+    return pulp.value(model.objective)
+
+
+def milp_rolling(window, step):
+    def engine(run, params):
+        rolling = load('t4', 'rolling')
+        with run.phase('solve'):
+            _, objective, _ = rolling.rolling_horizon(params, window, step)
+        return objective
+    return engine
+
+
+# ---------------------------------------------------------------------- t5: MST
+
+def mst_instance(V, E, seed):
+    import networkx as nx
+    rng = np.random.default_rng(seed)
+    E = min(E, V * (V - 1) // 2)
+    # random spanning tree for connectivity, then distinct random extra edges
+    order = rng.permutation(V)
+    parents = order[(rng.random(V - 1) * np.arange(1, V)).astype(int)]
+    u, v = order[1:], parents
+    while len(u) < E:
+        extra = rng.integers(V, size=(2, 2 * (E - len(u))))
+        u, v = np.concatenate((u, extra[0])), np.concatenate((v, extra[1]))
+        keys = np.minimum(u, v) * V + np.maximum(u, v)
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first[u[first] != v[first]])
+        u, v = u[first], v[first]
+    u, v = u[:E], v[:E]
+    graph = nx.Graph()
+    graph.add_nodes_from(range(V))
+    graph.add_weighted_edges_from(zip(u.tolist(), v.tolist(), rng.integers(1, 100, len(u)).tolist()))
+    return graph
+
+
+def mst_engine(method):
+    def engine(run, graph):
+        main = load('t5', 'main')
+        with run.phase('solve'):
+            tree = main.find_mst(graph, method)
+        with run.phase('extract'):
+            weight = tree.size(weight='weight')
+        return weight
+    return engine
+
+
+# ------------------------------------------------------------------- t6: sudoku
+
+LAYOUTS = {
+    'single': [[0, 0]],
+    'samurai': [[0, 0], [0, 12], [6, 6], [12, 0], [12, 12]],
+}
+
+
+def sudoku_instance(layout, clues, seed):
+    engine = load('t6', 'engine')
+    positions = LAYOUTS[layout]
+    empty = [{'pos': pos, 'arr': [[0] * 9 for _ in range(9)]} for pos in positions]
+    cells, grid_cells, _, _ = engine.build_layout(empty)
+    board = engine._search(engine.Board(engine.build_layout(empty)))
+
+    # relabelling digits keeps every unit valid; then keep a share of the cells as givens
+    rng = np.random.default_rng(seed)
+    digits = np.concatenate(([0], rng.permutation(9) + 1))
+    keep = rng.random(len(cells)) < clues
+    values = [int(digits[value]) if keep[cell] else 0 for cell, value in enumerate(board.values)]
+    return [{'pos': pos, 'arr': [[values[ids[i][j]] for j in range(9)] for i in range(9)]}
+            for pos, ids in zip(positions, grid_cells)]
+
+
+def sudoku_native(run, data):
+    engine = load('t6', 'engine')
+    with run.phase('build'):
+        layout = engine.build_layout(data)
+        board = engine.Board(layout)
+        for num, grid in enumerate(data):
+            for i in range(9):
+                for j in range(9):
+                    if grid['arr'][i][j]:
+                        board.place(layout[1][num][i][j], grid['arr'][i][j])
+    with run.phase('solve'):
+        result = engine._search(board)
+    with run.phase('extract'):
+        solutions = [[[result.values[ids[i][j]] for j in range(9)] for i in range(9)] for ids in layout[1]]
+    return sum(map(sum, solutions[0]))
+
+
+def sudoku_pulp(run, data):
+    from utils.solver_control import SolverControl
+    main = load('t6', 'main')
+    with run.phase('solve'):
+        _, solutions, _ = main.solve(data, SolverControl())
+    return sum(map(sum, solutions[0])) if solutions else None
+
+
+# --------------------------------------------------------------------- suites
+
+SUITES = {
+    'transport': {
+        'generate': transport_instance,
+        'engines': {'vogel+modi': transport_modi('vogel'), 'northwest+modi': transport_modi('northwest'),
+                    'lp': transport_lp},
+        'sizes': {
+            'small': [({'m': 20, 'n': 20}, None)],
+            'medium': [({'m': 100, 'n': 100}, None), ({'m': 300, 'n': 300}, ['vogel+modi', 'lp'])],
+            'large': [({'m': 1000, 'n': 1000}, ['vogel+modi', 'lp'])],
+        },
+    },
+    'transport-batch': {
+        'generate': transport_batch_instance,
+        'engines': {'batch-modi': transport_batch('modi'), 'batch-highs': transport_batch('highs'),
+                    'loop-modi': transport_loop},
+        'sizes': {
+            'small': [({'B': 100, 'm': 5, 'n': 5}, None)],
+            'medium': [({'B': 2000, 'm': 10, 'n': 12}, None)],
+            'large': [({'B': 20000, 'm': 10, 'n': 12}, ['batch-modi', 'loop-modi'])],
+        },
+    },
+    'maxflow': {
+        'generate': maxflow_instance,
+        'engines': {'dinic': maxflow_network('dinic'), 'push-relabel': maxflow_network('push-relabel'),
+                    'multi-dinic': maxflow_multi_terminal('dinic'),
+                    'multi-push-relabel': maxflow_multi_terminal('push-relabel'),
+                    'ford-fulkerson': maxflow_ford_fulkerson, 'min-cost': maxflow_min_cost},
+        'reference': 'ford-fulkerson',
+        'sizes': {
+            'small': [({'N': 100, 'density': 0.1}, None)],
+            'medium': [({'N': 500, 'density': 0.05}, ['dinic', 'push-relabel', 'multi-dinic', 'min-cost']),
+                       ({'N': 2000, 'density': 0.01}, ['dinic', 'push-relabel', 'multi-dinic', 'min-cost'])],
+            'large': [({'N': 20000, 'density': 0.001}, ['dinic', 'push-relabel', 'multi-dinic',
+                                                       'multi-push-relabel'])],
+        },
+    },
+    'maxflow-legacy': {
+        'generate': maxflow_legacy_instance,
+        'engines': {method: maxflow_legacy(method)
+                    for method in ('dinic', 'push-relabel', 'min-cost', 'ford-fulkerson')},
+        'reference': 'ford-fulkerson',
+        'sizes': {
+            'small': [({'N': 8, 'density': 0.4}, None), ({'N': 30, 'density': 0.2}, None)],
+            'medium': [({'N': 200, 'density': 0.05}, None)],
+            'large': [({'N': 500, 'density': 0.02}, None)],
+        },
+    },
+    'production': {
+        'generate': production_instance,
+        'engines': {'sparse': production_assembled('build_sparse'), 'dense': production_assembled('build_dense'),
+                    'warm': production_warm, 'colgen': production_colgen},
+        'sizes': {
+            'small': [({'nodes': 12, 'K': 3}, None)],
+            'medium': [({'nodes': 60, 'K': 10}, ['sparse', 'warm', 'colgen'])],
+            'large': [({'nodes': 200, 'K': 100}, ['sparse', 'warm', 'colgen'])],
+        },
+    },
+    'milp': {
+        'generate': milp_instance,
+        'engines': {'matrix': milp_matrix, 'pulp': milp_pulp, 'rolling-7/3': milp_rolling(7, 3)},
+        'sizes': {
+            'small': [({'K': 3, 'L': 2, 'N': 4, 'M': 5}, ['matrix', 'pulp'])],
+            'medium': [({'K': 10, 'L': 5, 'N': 20, 'M': 30}, None)],
+            'large': [({'K': 20, 'L': 5, 'N': 30, 'M': 365}, ['matrix', 'rolling-7/3'])],
+        },
+    },
+    'mst': {
+        'generate': mst_instance,
+        'engines': {'kruskal': mst_engine('kruskal'), 'prim': mst_engine('prim'), 'lp': mst_engine('lp')},
+        'sizes': {
+            'small': [({'V': 30, 'E': 90}, None)],
+            'medium': [({'V': 1000, 'E': 10000}, ['kruskal', 'prim']), ({'V': 80, 'E': 400}, ['lp'])],
+            'large': [({'V': 100000, 'E': 500000}, ['kruskal', 'prim'])],
+        },
+    },
+    'sudoku': {
+        'generate': sudoku_instance,
+        'engines': {'native': sudoku_native, 'pulp': sudoku_pulp},
+        'sizes': {
+            'small': [({'layout': 'single', 'clues': 0.35}, None)],
+            'medium': [({'layout': 'single', 'clues': 0.3}, None), ({'layout': 'samurai', 'clues': 0.35}, None)],
+            'large': [({'layout': 'samurai', 'clues': 0.3}, None)],
+        },
+    },
+}
+
+
+def measure(engine, instance, repeat, memory):
+    runs = []
+    objective = None
+    for _ in range(repeat):
+        run = Run()
+        objective = engine(run, instance)
+        runs.append(run.phases)
+    phases = {name: median(run[name] for run in runs) for name in runs[0]}
+    record = {
+        'phases': phases,
+        'total': sum(phases.values()),
+        'runs': runs,
+        'objective': None if objective is None else float(objective),
+        'peak_memory': None,
+    }
+    if memory:
+        run = Run(memory=True)
+        tracemalloc.start()
+        try:
+            engine(run, instance)
+        finally:
+            tracemalloc.stop()
+        record['peak_memory'] = run.peak
+    return record
+
+
+def benchmark(suites=None, size='small', repeat=3, memory=True, seed=0):
+    """Runs the selected suites and returns the list of result records."""
+    records = []
+    for suite_name in suites or SUITES:
+        suite = SUITES[suite_name]
+        for params, engines in suite['sizes'][size]:
+            instance = suite['generate'](**params, seed=seed)
+            objectives = {}
+            for engine_name in engines or suite['engines']:
+                record = {'suite': suite_name, 'engine': engine_name, 'size': size, 'params': params, 'seed': seed}
+                record.update(measure(suite['engines'][engine_name], instance, repeat, memory))
+                records.append(record)
+                phases = ' '.join(f'{name}={value:.4f}s' for name, value in record['phases'].items())
+                peak = '' if record['peak_memory'] is None else f" peak={record['peak_memory'] / 2 ** 20:.1f}MiB"
+                print(f"{suite_name:<11} {engine_name:<15} {json.dumps(params):<40} {phases}{peak}")
+                objectives[engine_name] = record['objective']
+            reference = objectives.get(suite.get('reference'))
+            if reference is not None:
+                wrong = {name: value for name, value in objectives.items()
+                         if value is not None and not np.isclose(value, reference)}
+                if wrong:
+                    raise RuntimeError(f"{suite_name} {json.dumps(params)}: {suite['reference']} gives "
+                                       f"{reference}, but {wrong}")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', nargs='*', choices=list(SUITES), help='suites to run (all by default)')
+    parser.add_argument('--size', default='small', choices=['small', 'medium', 'large'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--cache', action='store_true', help='keep the solution cache on')
+    args = parser.parse_args()
+
+    cache.configure(enabled=args.cache)
+
+    records = benchmark(args.suite, args.size, args.repeat, not args.no_memory, args.seed)
+    with open(args.output, 'w') as file:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'results': records,
+        }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
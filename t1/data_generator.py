@@ -0,0 +1,83 @@
+import numpy as np
+from json import loads, dumps
+
+
+# Бинарный формат задачи:
+#   {prefix}.npz         - векторы inputs и outputs
+#   {prefix}_matrix.npy  - матрица стоимостей (читается через np.load(mmap_mode='r'))
+
+def _paths(prefix):
+    return f'{prefix}.npz', f'{prefix}_matrix.npy'
+
+
+def generate(prefix, N, M, chunk_rows=1024, seed=None):
+    """
+    Генерация сбалансированной задачи того же вида, что и generator() в main.py,
+    но векторно и по блокам строк, без списков Python.
+    """
+    vectors_path, matrix_path = _paths(prefix)
+    rng = np.random.default_rng(seed)
+
+    inputs = rng.integers(10, 100, N)
+    outputs = rng.integers(10, 100, M)
+    delta = int(inputs.sum() - outputs.sum())
+    if delta > 0:
+        outputs = np.append(outputs, delta)
+    if delta < 0:
+        inputs = np.append(inputs, -delta)
+
+    # фиктивные строка/столбец баланса имеют нулевую стоимость
+    matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.int32,
+                                       shape=(len(inputs), len(outputs)))
+    for start in range(0, N, chunk_rows):
+        stop = min(start + chunk_rows, N)
+        matrix[start:stop, :M] = rng.integers(10, 100, (stop - start, M), dtype=np.int32)
+        matrix[start:stop, M:] = 0
+    matrix[N:] = 0
+    matrix.flush()
+    del matrix
+
+    np.savez(vectors_path, inputs=inputs, outputs=outputs)
+
+
+def generate_batch(B, N, M, seed=None):
+    """
+    Пакет из B сбалансированных задач одной формы (N, M) для solve_transport_batch:
+    (стоимости (B, N, M), запасы (B, N), потребности (B, M)). Вместо фиктивной
+    строки/столбца, размер которых менялся бы от задачи к задаче, общий запас
+    каждой задачи случайно делится между потребителями.
+    """
+    rng = np.random.default_rng(seed)
+    cost = rng.integers(10, 100, (B, N, M))
+    inputs = rng.integers(10, 100, (B, N))
+    totals = inputs.sum(axis=1)
+    low = min(10, int(totals.min()) // M)
+    outputs = rng.multinomial(totals - low * M, np.full(M, 1 / M)) + low
+    return cost, inputs, outputs
+
+
+def save(prefix, data):
+    """Сохранение задачи в бинарном формате (data - словарь как в data.json)."""
+    vectors_path, matrix_path = _paths(prefix)
+    np.save(matrix_path, np.asarray(data['matrix']))
+    np.savez(vectors_path, inputs=np.asarray(data['inputs']), outputs=np.asarray(data['outputs']))
+
+
+def load(prefix, mmap=True):
+    """Загрузка бинарной задачи; матрица стоимостей отображается в память без чтения."""
+    vectors_path, matrix_path = _paths(prefix)
+    with np.load(vectors_path) as vectors:
+        data = {'inputs': vectors['inputs'], 'outputs': vectors['outputs']}
+    data['matrix'] = np.load(matrix_path, mmap_mode='r' if mmap else None)
+    return data
+
+
+def json_to_binary(json_path, prefix):
+    with open(json_path) as file:
+        save(prefix, loads(file.read()))
+
+
+def binary_to_json(prefix, json_path):
+    data = load(prefix, mmap=False)
+    with open(json_path, 'w') as file:
+        file.write(dumps({key: np.asarray(value).tolist() for key, value in data.items()}))
@@ -1,9 +1,14 @@
-import numpy as np
-import graphviz as gz
-from scipy.optimize import linprog
+import sys
+from pathlib import Path
+
 from json import loads, dumps
 from random import randint
 
+from transport import solve_transport
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling, render
+
 
 def generator(N, M):
     with open('data.json', 'w') as file:
@@ -29,58 +34,50 @@ def generator(N, M):
         file.write(dumps(data))
 
 
-def show_matrix(data, name):
+# отрисовка, см. utils/render.py
+def show_matrix(data, name, **limits):
     N, M = len(data['inputs']), len(data['outputs'])
     names = [f"prov№{i}\n{data['inputs'][i]}" for i in range(N)] + [f"cons№{i}\n{data['outputs'][i]}" for i in range(M)]
 
-    graph = gz.Digraph(name)
+    edges = [(names[i], names[N + j], data['matrix'][i][j], {'label': f"{data['matrix'][i][j]}"})
+             for i in range(N) for j in range(M) if data['matrix'][i][j] != 0]
+    render.graphviz(name, names, edges, **limits)
 
-    for name in names:
-        graph.node(name)
 
-    for i in range(N):
-        for j in range(M):
-            if data['matrix'][i][j] != 0:
-                graph.edge(names[i], names[N+j], f"{data['matrix'][i][j]}")
+# решение без отрисовки: данные в том же формате с планом перевозок вместо стоимостей
+def solve(data):
+    with profiling.span('t1.solve'):
+        with profiling.span('solve'):
+            X, cost = solve_transport(data['matrix'], data['inputs'], data['outputs'])
+            profiling.count('variables', len(data['inputs']) * len(data['outputs']))
+            profiling.count('constraints', len(data['inputs']) + len(data['outputs']))
 
-    graph.render(directory='d_render', view=True)
+        with profiling.span('extract'):
+            solution = dict(data, matrix=[[int(round(x)) for x in row] for row in X])
+    return solution, cost
 
 
-def main():
+def main(draw=True, **limits):
     if input('new data?(y/n): ').lower() == 'y':
         generator(int(input('inputs: ')), int(input('outputs: ')))
     with open('data.json', 'r') as file:
         data = loads(file.read())
-    show_matrix(data, 'data')
-
-    m = len(data['inputs'])
-    n = len(data['outputs'])
-
-    p = np.array(data['inputs'])
-    q = np.array(data['outputs'])
-
-    C = np.array(data['matrix'])
-
-    C_vec = C.reshape((m * n, 1), order='F')
-
-    A1 = np.kron(np.ones((1, n)), np.identity(m))
-    A2 = np.kron(np.identity(n), np.ones((1, m)))
-    A = np.vstack([A1, A2])
-
-    b = np.hstack([p, q])
 
-    res = linprog(C_vec, A_eq=A, b_eq=b)
-    if res['success']:
-        arr = []
-        for i in range(m):
-            l = []
-            for j in range(n):
-                l.append(int(res.x[j*m+i]))
-            arr.append(l)
-        data['matrix'] = arr
-        show_matrix(data, 'solution')
-    else:
-        print(res)
+    with profiling.span('t1.main'):
+        if draw:
+            with profiling.span('render'):
+                show_matrix(data, 'data', **limits)
+
+        try:
+            solution, cost = solve(data)
+        except ValueError as e:
+            print(e)
+            return
+
+        print(f"cost: {cost}")
+        if draw:
+            with profiling.span('render'):
+                show_matrix(solution, 'solution', **limits)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,421 @@
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.cache import cached
+
+
+# Базис транспортной задачи - m + n - 1 клеток, образующих остовное дерево
+# двудольного графа "поставщики - потребители". Все функции работают
+# напрямую с матрицей стоимостей (m, n) и векторами запасов/потребностей.
+
+def _check_balance(supply, demand):
+    if not np.isclose(supply.sum(), demand.sum()):
+        raise ValueError(f"задача не сбалансирована: {supply.sum()} != {demand.sum()}")
+
+
+def northwest_corner(supply, demand):
+    """Начальный план методом северо-западного угла: (X, базисные клетки)."""
+    s = np.array(supply, dtype=float)
+    d = np.array(demand, dtype=float)
+    m, n = len(s), len(d)
+    X = np.zeros((m, n))
+    basis = []
+    i = j = 0
+    while True:
+        q = min(s[i], d[j])
+        X[i, j] = q
+        basis.append((i, j))
+        s[i] -= q
+        d[j] -= q
+        if i == m - 1 and j == n - 1:
+            break
+        # вычеркиваем ровно одну линию, чтобы базис остался деревом
+        if (s[i] <= 0 and i < m - 1) or j == n - 1:
+            i += 1
+        else:
+            j += 1
+    return X, basis
+
+
+def _next_active(order, pos, active):
+    while pos < len(order) and not active[order[pos]]:
+        pos += 1
+    return pos
+
+
+def vogel(cost, supply, demand):
+    """Начальный план методом Фогеля (аппроксимация Фогеля): (X, базисные клетки)."""
+    C = np.asarray(cost, dtype=float)
+    s = np.array(supply, dtype=float)
+    d = np.array(demand, dtype=float)
+    m, n = C.shape
+    X = np.zeros((m, n))
+    basis = []
+
+    # для каждой строки/столбца - порядок клеток по возрастанию стоимости
+    # и указатели на две самые дешевые невычеркнутые клетки
+    row_order = np.argsort(C, axis=1, kind='stable')
+    col_order = np.argsort(C, axis=0, kind='stable').T
+    row_active = np.ones(m, dtype=bool)
+    col_active = np.ones(n, dtype=bool)
+    row_ptr = np.zeros((m, 2), dtype=int)
+    col_ptr = np.zeros((n, 2), dtype=int)
+    row_ptr[:, 1] = 1
+    col_ptr[:, 1] = 1
+    row_pen = np.empty(m)
+    col_pen = np.empty(n)
+
+    def penalty(costs, order, ptr):
+        first, second = ptr
+        if second < len(order):
+            return costs[order[second]] - costs[order[first]]
+        if first < len(order):
+            return costs[order[first]]
+        return -1.0
+
+    for i in range(m):
+        row_pen[i] = penalty(C[i], row_order[i], row_ptr[i])
+    for j in range(n):
+        col_pen[j] = penalty(C[:, j], col_order[j], col_ptr[j])
+
+    def cross_out(line, order, ptr, pen, costs, active_other, lines_active):
+        # строки/столбцы, у которых вычеркнутая линия была среди двух лучших
+        first = order[np.arange(len(order)), np.minimum(ptr[:, 0], order.shape[1] - 1)]
+        second = order[np.arange(len(order)), np.minimum(ptr[:, 1], order.shape[1] - 1)]
+        affected = np.flatnonzero(lines_active & ((first == line) | (second == line)))
+        for k in affected:
+            o = order[k]
+            p1, p2 = ptr[k]
+            if p1 >= len(o):
+                continue
+            if o[p1] == line:
+                p1 = p2
+            p1 = _next_active(o, p1, active_other)
+            p2 = _next_active(o, max(p2, p1 + 1), active_other)
+            ptr[k] = p1, p2
+            pen[k] = penalty(costs(k), o, ptr[k])
+
+    rows_left, cols_left = m, n
+    while rows_left and cols_left:
+        i = int(np.argmax(np.where(row_active, row_pen, -np.inf)))
+        j = int(np.argmax(np.where(col_active, col_pen, -np.inf)))
+        if row_pen[i] >= col_pen[j]:
+            j = int(row_order[i, row_ptr[i, 0]])
+        else:
+            i = int(col_order[j, col_ptr[j, 0]])
+
+        q = min(s[i], d[j])
+        X[i, j] = q
+        basis.append((i, j))
+        s[i] -= q
+        d[j] -= q
+
+        if rows_left == 1 and cols_left == 1:
+            break
+        if (s[i] <= 0 and rows_left > 1) or cols_left == 1:
+            row_active[i] = False
+            rows_left -= 1
+            cross_out(i, col_order, col_ptr, col_pen, lambda k: C[:, k], row_active, col_active)
+        else:
+            col_active[j] = False
+            cols_left -= 1
+            cross_out(j, row_order, row_ptr, row_pen, lambda k: C[k], col_active, row_active)
+
+    return X, basis
+
+
+def _spanning_tree(adj, cell_cost, m):
+    # обход базисного дерева от строки 0: потенциалы u (строки) и v (столбцы),
+    # а также родитель и глубина каждой вершины для поиска циклов.
+    # Вершины: строки 0..m-1, столбцы m..m+n-1.
+    size = len(adj)
+    potential = [0.0] * size
+    parent = [-1] * size
+    depth = [0] * size
+    parent[0] = 0
+    queue = deque([0])
+    while queue:
+        a = queue.popleft()
+        for b in adj[a]:
+            if parent[b] < 0:
+                parent[b] = a
+                depth[b] = depth[a] + 1
+                cell = (a, b - m) if a < m else (b, a - m)
+                potential[b] = cell_cost[cell] - potential[a]
+                queue.append(b)
+    return potential, parent, depth
+
+
+def _cycle(parent, depth, i, j, m):
+    # путь в базисном дереве от строки i до столбца j через общего предка
+    up, down = [i], [m + j]
+    while up[-1] != down[-1]:
+        if depth[up[-1]] >= depth[down[-1]]:
+            up.append(parent[up[-1]])
+        else:
+            down.append(parent[down[-1]])
+    path = up + down[-2::-1]
+    # клетки цикла в порядке обхода: четные - "минус", нечетные - "плюс"
+    return [(a, b - m) if a < m else (b, a - m) for a, b in zip(path, path[1:])]
+
+
+def modi(cost, X, basis, max_iter=None):
+    """
+    Улучшение опорного плана методом потенциалов (MODI, u-v метод).
+
+    Работает в памяти O(m*n): матрица стоимостей, план и оценки свободных клеток.
+    """
+    C = np.asarray(cost, dtype=float)
+    X = X.copy()
+    m, n = C.shape
+    adj = [set() for _ in range(m + n)]
+    cell_cost = {}
+    for i, j in basis:
+        adj[i].add(m + j)
+        adj[m + j].add(i)
+        cell_cost[(i, j)] = float(C[i, j])
+
+    tol = 1e-9 * max(1.0, np.abs(C).max(initial=0.0))
+    iteration = 0
+    while max_iter is None or iteration < max_iter:
+        iteration += 1
+        potential, parent, depth = _spanning_tree(adj, cell_cost, m)
+        u = np.array(potential[:m])
+        v = np.array(potential[m:])
+        reduced = C - u[:, None] - v[None, :]
+        flat = int(np.argmin(reduced))
+        if reduced.flat[flat] >= -tol:
+            break
+        i, j = divmod(flat, n)
+
+        cells = _cycle(parent, depth, i, j, m)
+        minus = cells[0::2]
+        plus = cells[1::2]
+        out = min(minus, key=lambda cell: X[cell])
+        theta = X[out]
+        X[i, j] += theta
+        for cell in minus:
+            X[cell] -= theta
+        for cell in plus:
+            X[cell] += theta
+        X[out] = 0.0
+
+        adj[out[0]].discard(m + out[1])
+        adj[m + out[1]].discard(out[0])
+        del cell_cost[out]
+        adj[i].add(m + j)
+        adj[m + j].add(i)
+        cell_cost[(i, j)] = float(C[i, j])
+
+    return X
+
+
+@cached('t1.solve_transport')
+def solve_transport(cost, supply, demand, start='vogel', max_iter=None):
+    """
+    Решение сбалансированной транспортной задачи без построения матрицы ограничений.
+
+    Args:
+        cost: матрица стоимостей (m, n).
+        supply: запасы поставщиков (m).
+        demand: потребности потребителей (n).
+        start: начальный план - 'vogel' или 'northwest'.
+
+    Returns:
+        (X, стоимость плана)
+    """
+    C = np.asarray(cost, dtype=float)
+    supply = np.asarray(supply, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    _check_balance(supply, demand)
+
+    if start == 'vogel':
+        X, basis = vogel(C, supply, demand)
+    elif start == 'northwest':
+        X, basis = northwest_corner(supply, demand)
+    else:
+        raise ValueError(f"неизвестный метод начального плана: {start}")
+
+    X = modi(C, X, basis, max_iter)
+    return X, float((C * X).sum())
+
+
+def constraint_matrix(m, n):
+    """Разреженная матрица ограничений-равенств (m + n) x (m * n), переменная x[i, j] -> i * n + j."""
+    cells = np.arange(m * n)
+    rows = np.concatenate((cells // n, m + cells % n))
+    data = np.ones(2 * m * n)
+    return coo_matrix((data, (rows, np.concatenate((cells, cells)))), shape=(m + n, m * n)).tocsr()
+
+
+@cached('t1.solve_transport_lp')
+def solve_transport_lp(cost, supply, demand):
+    """Запасной вариант: та же задача через HiGHS с разреженной матрицей ограничений."""
+    C = np.asarray(cost, dtype=float)
+    m, n = C.shape
+    b = np.concatenate((np.asarray(supply, dtype=float), np.asarray(demand, dtype=float)))
+    res = linprog(C.ravel(), A_eq=constraint_matrix(m, n), b_eq=b, bounds=(0, None), method='highs')
+    if not res.success:
+        raise ValueError(res.message)
+    return res.x.reshape(m, n), float(res.fun)
+
+
+# Пакетное решение B задач одной формы (m, n): cost (B, m, n), supply (B, m),
+# demand (B, n). Начальные планы строятся сразу для всего пакета - у обоих
+# методов ровно m + n - 1 шагов, на каждом вычеркивается одна линия в каждой
+# задаче, поэтому шаги выполняются операциями над массивами по оси пакета.
+
+def _check_balance_batch(supply, demand):
+    bad = np.flatnonzero(~np.isclose(supply.sum(axis=1), demand.sum(axis=1)))
+    if len(bad):
+        raise ValueError(f"задачи не сбалансированы: {bad.tolist()}")
+
+
+def northwest_corner_batch(supply, demand):
+    """Северо-западный угол для пакета: (X (B, m, n), базисные клетки (B, m + n - 1, 2))."""
+    s = np.array(supply, dtype=float)
+    d = np.array(demand, dtype=float)
+    (B, m), n = s.shape, d.shape[1]
+    X = np.zeros((B, m, n))
+    basis = np.empty((B, m + n - 1, 2), dtype=int)
+    batch = np.arange(B)
+    i = np.zeros(B, dtype=int)
+    j = np.zeros(B, dtype=int)
+    for step in range(m + n - 1):
+        q = np.minimum(s[batch, i], d[batch, j])
+        X[batch, i, j] = q
+        basis[:, step, 0] = i
+        basis[:, step, 1] = j
+        s[batch, i] -= q
+        d[batch, j] -= q
+        # вычеркиваем ровно одну линию, как в northwest_corner
+        down = ((s[batch, i] <= 0) & (i < m - 1)) | (j == n - 1)
+        i = np.where(down, np.minimum(i + 1, m - 1), i)
+        j = np.where(down, j, j + 1)
+    return X, basis
+
+
+def _penalties(masked, axis):
+    # разность двух наименьших невычеркнутых стоимостей линии; одна клетка - ее
+    # стоимость; вычеркнутая линия - -inf
+    if masked.shape[axis] > 1:
+        two = np.partition(masked, 1, axis=axis)
+        first, second = np.take(two, 0, axis=axis), np.take(two, 1, axis=axis)
+    else:
+        first = np.take(masked, 0, axis=axis)
+        second = np.full_like(first, np.inf)
+    with np.errstate(invalid='ignore'):  # inf - inf у вычеркнутых линий
+        penalty = np.where(np.isinf(second), first, second - first)
+    return np.where(np.isinf(first), -np.inf, penalty)
+
+
+def vogel_batch(cost, supply, demand):
+    """Аппроксимация Фогеля для пакета, с тем же выбором клеток, что и vogel()."""
+    C = np.asarray(cost, dtype=float)
+    s = np.array(supply, dtype=float)
+    d = np.array(demand, dtype=float)
+    B, m, n = C.shape
+    X = np.zeros((B, m, n))
+    basis = np.empty((B, m + n - 1, 2), dtype=int)
+    batch = np.arange(B)
+    row_active = np.ones((B, m), dtype=bool)
+    col_active = np.ones((B, n), dtype=bool)
+    rows_left = np.full(B, m)
+    cols_left = np.full(B, n)
+    for step in range(m + n - 1):
+        masked = np.where(row_active[:, :, None] & col_active[:, None, :], C, np.inf)
+        row_pen = _penalties(masked, 2)
+        col_pen = _penalties(masked, 1)
+        i = np.argmax(row_pen, axis=1)
+        j = np.argmax(col_pen, axis=1)
+        by_row = row_pen[batch, i] >= col_pen[batch, j]
+        i = np.where(by_row, i, np.argmin(masked[batch, :, j], axis=1))
+        j = np.where(by_row, np.argmin(masked[batch, i, :], axis=1), j)
+
+        q = np.minimum(s[batch, i], d[batch, j])
+        X[batch, i, j] = q
+        basis[:, step, 0] = i
+        basis[:, step, 1] = j
+        s[batch, i] -= q
+        d[batch, j] -= q
+
+        cross_row = ((s[batch, i] <= 0) & (rows_left > 1)) | (cols_left == 1)
+        row_active[batch[cross_row], i[cross_row]] = False
+        col_active[batch[~cross_row], j[~cross_row]] = False
+        rows_left -= cross_row
+        cols_left -= ~cross_row
+    return X, basis
+
+
+_worker_A = None
+
+
+def _init_worker(m, n):
+    # одна матрица ограничений на процесс для всех задач пакета
+    global _worker_A
+    _worker_A = constraint_matrix(m, n)
+
+
+def _solve_instance(task):
+    C, supply, demand, X, basis, max_iter = task
+    if X is not None:
+        return modi(C, X, [tuple(cell) for cell in basis.tolist()], max_iter)
+    res = linprog(C.ravel(), A_eq=_worker_A, b_eq=np.concatenate((supply, demand)), bounds=(0, None),
+                  method='highs')
+    if not res.success:
+        raise ValueError(res.message)
+    return res.x.reshape(C.shape)
+
+
+@cached('t1.solve_transport_batch', ignore=('workers',))
+def solve_transport_batch(cost, supply, demand, start='vogel', method='modi', workers=None, max_iter=None):
+    """
+    Пакетное решение сбалансированных транспортных задач одной формы.
+
+    Args:
+        cost: стоимости (B, m, n).
+        supply: запасы (B, m).
+        demand: потребности (B, n).
+        start: начальный план для MODI - 'vogel' или 'northwest' (строится для всего пакета сразу).
+        method: 'modi' или 'highs' (linprog с общей разреженной матрицей ограничений).
+        workers: процессов в пуле; 1 - решать в текущем процессе.
+
+    Returns:
+        (X (B, m, n), стоимости планов (B))
+    """
+    C = np.asarray(cost, dtype=float)
+    supply = np.asarray(supply, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    B, m, n = C.shape
+    assert supply.shape == (B, m) and demand.shape == (B, n)
+    _check_balance_batch(supply, demand)
+
+    if method == 'modi':
+        if start == 'vogel':
+            X0, basis = vogel_batch(C, supply, demand)
+        elif start == 'northwest':
+            X0, basis = northwest_corner_batch(supply, demand)
+        else:
+            raise ValueError(f"неизвестный метод начального плана: {start}")
+        tasks = [(C[k], None, None, X0[k], basis[k], max_iter) for k in range(B)]
+    elif method == 'highs':
+        tasks = [(C[k], supply[k], demand[k], None, None, None) for k in range(B)]
+    else:
+        raise ValueError(f"неизвестный метод решения: {method}")
+
+    if workers == 1:
+        _init_worker(m, n)
+        plans = list(map(_solve_instance, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(m, n)) as pool:
+            plans = list(pool.map(_solve_instance, tasks, chunksize=max(1, B // 64)))
+
+    X = np.stack(plans) if plans else np.zeros((0, m, n))
+    return X, (C * X).sum(axis=(1, 2))
@@ -0,0 +1,135 @@
+from json import dumps, loads
+
+import numpy as np
+
+from flow import MultiTerminalFlow
+
+
+# Binary instance format:
+#   {prefix}.npz        - n, inputs, outputs, sources, sinks (optionally supplies, demands)
+#   {prefix}_edges.npy  - int32 rows (tail, head, capacity), loadable with mmap_mode='r'
+
+
+def _paths(prefix):
+    return f'{prefix}.npz', f'{prefix}_edges.npy'
+
+
+def _chunk_mask(rng, start, stop, N, chance, inputs, outputs):
+    mask = rng.random((stop - start, N)) < chance
+    mask[:, :inputs] = False
+    rows = np.arange(start, stop)
+    mask[rows >= N - outputs] = False
+    mask[rows - start, rows] = False
+    return mask
+
+
+def generate(prefix, N, chance, inputs, outputs, chunk_rows=1024, seed=None):
+    """
+    Same graph family as ``gen_data``, written as a sparse edge list.
+
+    Rows are generated in chunks with a per-chunk RNG stream: the first pass
+    only counts edges, the second regenerates the same chunks and writes them
+    straight into the memory-mapped output file.
+    """
+    assert inputs + outputs <= N
+    chance = min(max(chance, 0.0), 1.0)
+    meta_path, edges_path = _paths(prefix)
+
+    starts = list(range(0, N, chunk_rows))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    counts = []
+    for start, chunk_seed in zip(starts, seeds):
+        stop = min(start + chunk_rows, N)
+        counts.append(int(_chunk_mask(np.random.default_rng(chunk_seed), start, stop,
+                                      N, chance, inputs, outputs).sum()))
+    n = sum(counts)
+    print(f'edges: {n}')
+
+    edges = np.lib.format.open_memmap(edges_path, mode='w+', dtype=np.int32, shape=(n, 3))
+    offset = 0
+    for start, chunk_seed, count in zip(starts, seeds, counts):
+        stop = min(start + chunk_rows, N)
+        rng = np.random.default_rng(chunk_seed)
+        tails, heads = np.nonzero(_chunk_mask(rng, start, stop, N, chance, inputs, outputs))
+        block = edges[offset:offset + count]
+        block[:, 0] = tails + start
+        block[:, 1] = heads
+        block[:, 2] = rng.integers(1, 21, count)
+        offset += count
+    edges.flush()
+    del edges
+
+    # inputs and outputs are stored as node lists, no super-source or super-sink
+    np.savez(meta_path, n=N, inputs=inputs, outputs=outputs,
+             sources=np.arange(inputs), sinks=N - 1 - np.arange(outputs))
+
+
+def names(n):
+    return [f"{i + 1}" for i in range(n)]
+
+
+def load(prefix, mmap=True):
+    """
+    Returns:
+        (n, edges, meta): node count, the (E, 3) edge array (memory-mapped by
+        default) and the remaining metadata (sources, sinks and the optional
+        supplies, demands as arrays).
+    """
+    meta_path, edges_path = _paths(prefix)
+    with np.load(meta_path) as meta:
+        meta = {key: int(meta[key]) if meta[key].ndim == 0 else meta[key] for key in meta.files}
+    edges = np.load(edges_path, mmap_mode='r' if mmap else None)
+    return meta['n'], edges, meta
+
+
+def load_network(prefix, prune=True):
+    """Builds a MultiTerminalFlow directly from the binary edge list."""
+    n, edges, meta = load(prefix)
+    return MultiTerminalFlow(n, edges[:, 0], edges[:, 1], edges[:, 2], meta['sources'], meta['sinks'],
+                             meta.get('supplies'), meta.get('demands'), prune=prune)
+
+
+def to_data(prefix):
+    """Converts a binary instance to the ``data.json`` dictionary format."""
+    n, edges, meta = load(prefix)
+    arr = np.zeros((n, n), dtype=np.int64)
+    arr[edges[:, 0], edges[:, 1]] = edges[:, 2]
+    data = {
+        'arr': arr.tolist(),
+        'names': names(n),
+        'sources': meta['sources'].tolist(),
+        'sinks': meta['sinks'].tolist(),
+        'inputs': meta['inputs'],
+        'outputs': meta['outputs']
+    }
+    for key in ('supplies', 'demands'):
+        if key in meta:
+            data[key] = meta[key].tolist()
+    return data
+
+
+def from_data(prefix, data):
+    """
+    Stores a ``data.json`` dictionary as a binary edge list. Older files
+    without ``sources``/``sinks`` keep their super nodes, which become the
+    single source 0 and sink N - 1.
+    """
+    meta_path, edges_path = _paths(prefix)
+    arr = np.asarray(data['arr'])
+    tails, heads = np.nonzero(arr)
+    np.save(edges_path, np.stack((tails, heads, arr[tails, heads]), axis=1).astype(np.int32))
+    meta = {'sources': data.get('sources', [0]), 'sinks': data.get('sinks', [len(arr) - 1])}
+    for key in ('supplies', 'demands'):
+        if data.get(key) is not None:
+            meta[key] = data[key]
+    np.savez(meta_path, n=len(arr), inputs=data['inputs'], outputs=data['outputs'], **meta)
+
+
+def json_to_binary(json_path, prefix):
+    with open(json_path) as file:
+        from_data(prefix, loads(file.read()))
+
+
+def binary_to_json(prefix, json_path):
+    with open(json_path, 'w') as file:
+        file.write(dumps(to_data(prefix)))
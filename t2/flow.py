@@ -0,0 +1,932 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import NegativeCycleError, bellman_ford, breadth_first_order, dijkstra
+
+
+class FlowNetwork:
+    """
+    Residual network stored as a compact edge list (CSR by tail node).
+
+    Every original edge e gets a forward arc and a paired reverse arc, so the
+    residual capacity of both directions lives in one flat list and
+    ``rev[a]`` gives the partner of arc ``a``. Arcs leaving node ``u`` are
+    ``start[u]:start[u + 1]``.
+    """
+
+    def __init__(self, n, tails, heads, capacities):
+        """
+        Args:
+            n: Number of nodes.
+            tails: Tail node of every edge.
+            heads: Head node of every edge.
+            capacities: Capacity of every edge.
+        """
+        tails = np.asarray(tails, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        capacities = np.asarray(capacities)
+        m = len(tails)
+
+        # arc 2e - forward arc of edge e, arc 2e+1 - its reverse arc
+        arc_tail = np.empty(2 * m, dtype=np.int64)
+        arc_tail[0::2] = tails
+        arc_tail[1::2] = heads
+        arc_head = np.empty(2 * m, dtype=np.int64)
+        arc_head[0::2] = heads
+        arc_head[1::2] = tails
+        arc_cap = np.zeros(2 * m, dtype=capacities.dtype)
+        arc_cap[0::2] = capacities
+
+        order = np.argsort(arc_tail, kind='stable')
+        position = np.empty(2 * m, dtype=np.int64)
+        position[order] = np.arange(2 * m)
+
+        self.n = n
+        self.start = np.concatenate(([0], np.cumsum(np.bincount(arc_tail, minlength=n)))).tolist()
+        self.head = arc_head[order].tolist()
+        self.cap = arc_cap[order].tolist()
+        self.rev = position[order ^ 1].tolist()
+        self.edge_arc = position[0::2].tolist()
+
+        self.tails = tails.tolist()
+        self.heads = heads.tolist()
+        self.capacity = capacities.tolist()
+        self._edge_index = None
+        self.stats = {}  # counters of the last max_flow call
+
+    @classmethod
+    def from_matrix(cls, arr):
+        """Builds the network from a dense capacity matrix (``data['arr']`` format)."""
+        arr = np.asarray(arr)
+        tails, heads = np.nonzero(arr > 0)
+        return cls(len(arr), tails, heads, arr[tails, heads])
+
+    def max_flow(self, s, t, method='dinic'):
+        """
+        Computes the maximum s-t flow on top of the current residual network.
+
+        Args:
+            s: Source node.
+            t: Sink node.
+            method: 'dinic' or 'push-relabel'.
+
+        Returns:
+            The value of the flow pushed by this call.
+        """
+        if method == 'dinic':
+            return self.dinic(s, t)
+        if method == 'push-relabel':
+            return self.push_relabel(s, t)
+        raise ValueError(f"unknown max flow method: {method}")
+
+    def levels(self, s, t=None):
+        """
+        Breadth-first search over arcs with positive residual capacity.
+
+        Stops as soon as ``t`` is labelled: nodes on the same or deeper layers
+        cannot lie on a shortest augmenting path.
+
+        Returns:
+            Distance from ``s`` for every node, -1 for unreachable nodes.
+        """
+        start, head, cap = self.start, self.head, self.cap
+        level = [-1] * self.n
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            next_level = level[u] + 1
+            for a in range(start[u], start[u + 1]):
+                v = head[a]
+                if level[v] < 0 and cap[a] > 0:
+                    level[v] = next_level
+                    if v == t:
+                        return level
+                    queue.append(v)
+        return level
+
+    def dinic(self, s, t):
+        """Dinic's algorithm: blocking flows on the BFS level graph."""
+        if s == t:
+            return 0
+        start, head, cap, rev = self.start, self.head, self.cap, self.rev
+        total = 0
+        phases = paths = 0
+        while True:
+            level = self.levels(s, t)
+            if level[t] < 0:
+                self.stats = {'phases': phases, 'augmenting_paths': paths}
+                return total
+            phases += 1
+            current = start[:-1]
+            path = []
+            u = s
+            while True:
+                if u == t:
+                    flow = min(cap[a] for a in path)
+                    for a in path:
+                        cap[a] -= flow
+                        cap[rev[a]] += flow
+                    total += flow
+                    paths += 1
+                    path = []
+                    u = s
+                    continue
+                end = start[u + 1]
+                a = current[u]
+                next_level = level[u] + 1
+                while a < end and (cap[a] <= 0 or level[head[a]] != next_level):
+                    a += 1
+                current[u] = a
+                if a < end:
+                    path.append(a)
+                    u = head[a]
+                    continue
+                # dead end: drop the node from this phase
+                level[u] = -1
+                if not path:
+                    break
+                a = path.pop()
+                u = head[rev[a]]
+                current[u] += 1
+
+    def push_relabel(self, s, t):
+        """
+        Highest-label push-relabel with the gap heuristic and periodic global
+        relabelling. Excess that cannot reach ``t`` is returned to ``s``, so a
+        valid flow (not just a preflow) is left in the residual network.
+        """
+        if s == t:
+            return 0
+        n = self.n
+        start, head, cap, rev = self.start, self.head, self.cap, self.rev
+        top = 2 * n
+        height = [0] * n
+        excess = [0] * n
+        current = start[:-1]
+        count = [0] * (top + 1)
+        buckets = [[] for _ in range(top + 1)]
+
+        height[s] = n
+        for a in range(start[s], start[s + 1]):
+            flow = cap[a]
+            if flow > 0:
+                cap[a] = 0
+                cap[rev[a]] += flow
+                excess[head[a]] += flow
+                excess[s] -= flow
+
+        def global_relabel():
+            # exact labels: distance to t, otherwise n + distance to s
+            for v in range(n):
+                height[v] = top
+            height[t] = 0
+            height[s] = n
+            for root in (t, s):
+                queue = deque([root])
+                while queue:
+                    v = queue.popleft()
+                    h = height[v] + 1
+                    for a in range(start[v], start[v + 1]):
+                        u = head[a]
+                        if height[u] == top and cap[rev[a]] > 0:
+                            height[u] = h
+                            queue.append(u)
+            for h in range(top + 1):
+                count[h] = 0
+                buckets[h] = []
+            for v in range(n):
+                count[height[v]] += 1
+                current[v] = start[v]
+                if excess[v] > 0 and v != s and v != t:
+                    buckets[height[v]].append(v)
+
+        global_relabel()
+        relabels = 0
+        total_relabels = 0
+        highest = top
+        while highest >= 0:
+            if not buckets[highest]:
+                highest -= 1
+                continue
+            u = buckets[highest].pop()
+            if height[u] != highest or excess[u] <= 0:
+                continue
+
+            end = start[u + 1]
+            while excess[u] > 0:
+                a = current[u]
+                if a == end:
+                    # relabel
+                    old = height[u]
+                    new = top
+                    for b in range(start[u], end):
+                        if cap[b] > 0 and height[head[b]] + 1 < new:
+                            new = height[head[b]] + 1
+                    count[old] -= 1
+                    if count[old] == 0 and old < n:
+                        # gap: nodes above the empty level can no longer reach t
+                        for w in range(n):
+                            if old < height[w] < n:
+                                count[height[w]] -= 1
+                                height[w] = n + 1
+                                count[n + 1] += 1
+                                if excess[w] > 0 and w != s and w != t:
+                                    buckets[n + 1].append(w)
+                        new = max(new, n + 1)
+                        highest = max(highest, n + 1)
+                    height[u] = new
+                    count[new] += 1
+                    current[u] = start[u]
+                    relabels += 1
+                    total_relabels += 1
+                    if relabels >= n:
+                        relabels = 0
+                        global_relabel()
+                        highest = top
+                        if excess[u] > 0:
+                            buckets[height[u]].append(u)
+                        break
+                    continue
+                v = head[a]
+                if cap[a] > 0 and height[u] == height[v] + 1:
+                    flow = excess[u] if excess[u] < cap[a] else cap[a]
+                    if excess[v] == 0 and v != s and v != t:
+                        buckets[height[v]].append(v)
+                    cap[a] -= flow
+                    cap[rev[a]] += flow
+                    excess[u] -= flow
+                    excess[v] += flow
+                    if cap[a] == 0:
+                        current[u] = a + 1
+                else:
+                    current[u] = a + 1
+            # after a relabel u may have pushed to nodes above the current level
+            highest = max(highest, height[u])
+
+        self.stats = {'relabels': total_relabels}
+        return excess[t]
+
+    def edge(self, u, v):
+        """Index of the edge u -> v, or None if the network has no such edge."""
+        if self._edge_index is None:
+            self._edge_index = {(u, v): e for e, (u, v) in enumerate(zip(self.tails, self.heads))}
+        return self._edge_index.get((u, v))
+
+    def augment(self, s, t, limit):
+        """
+        Pushes up to ``limit`` units from ``s`` to ``t`` along shortest residual
+        paths. Used for local repairs, where only a few paths are expected.
+
+        Returns:
+            The amount actually pushed.
+        """
+        start, head, cap, rev = self.start, self.head, self.cap, self.rev
+        pushed = 0
+        while pushed < limit and s != t:
+            parent = [-1] * self.n
+            parent[s] = -2
+            queue = deque([s])
+            while queue and parent[t] == -1:
+                u = queue.popleft()
+                for a in range(start[u], start[u + 1]):
+                    v = head[a]
+                    if parent[v] == -1 and cap[a] > 0:
+                        parent[v] = a
+                        if v == t:
+                            break
+                        queue.append(v)
+            if parent[t] == -1:
+                break
+
+            flow = limit - pushed
+            v = t
+            while v != s:
+                a = parent[v]
+                flow = min(flow, cap[a])
+                v = head[rev[a]]
+            v = t
+            while v != s:
+                a = parent[v]
+                cap[a] -= flow
+                cap[rev[a]] += flow
+                v = head[rev[a]]
+            pushed += flow
+        return pushed
+
+    def min_cut(self, s):
+        """
+        Minimum cut read from the final residual network of an s-t max flow.
+
+        Returns:
+            (source_side, cut_edges): the set of nodes reachable from ``s`` in
+            the residual network and the saturated edges (u, v, capacity)
+            leaving it.
+        """
+        level = self.levels(s)
+        source_side = {v for v in range(self.n) if level[v] >= 0}
+        cut_edges = [(u, v, c) for u, v, c in zip(self.tails, self.heads, self.capacity)
+                     if level[u] >= 0 and level[v] < 0]
+        return source_side, cut_edges
+
+    def reset(self):
+        """Restores zero flow on every edge."""
+        cap, rev = self.cap, self.rev
+        for e, a in enumerate(self.edge_arc):
+            cap[a] = self.capacity[e]
+            cap[rev[a]] = 0
+
+    def edge_flows(self):
+        """Flow on every original edge, in the order the edges were given."""
+        cap, capacity = self.cap, self.capacity
+        return [capacity[e] - cap[a] for e, a in enumerate(self.edge_arc)]
+
+    def residual_matrix(self):
+        """Dense residual matrix, as returned by ``Graph.FordFulkerson``."""
+        residual = [[0] * self.n for _ in range(self.n)]
+        start, head, cap = self.start, self.head, self.cap
+        for u in range(self.n):
+            row = residual[u]
+            for a in range(start[u], start[u + 1]):
+                row[head[a]] += cap[a]
+        return residual
+
+
+class MinCostFlowNetwork(FlowNetwork):
+    """
+    FlowNetwork with a cost per unit of flow on every edge.
+
+    Min-cost flow is found by successive shortest paths in the primal-dual
+    form. Dijkstra over reduced costs (Johnson potentials) gives the
+    distances, the potentials are raised by them, and a blocking flow is
+    pushed through the admissible arcs before the next Dijkstra run. An arc
+    is admissible when it has residual capacity and zero reduced cost. All
+    shortest paths of equal length are thus saturated by one Dijkstra run,
+    not one path per run. The per-phase scans over all arcs (Dijkstra, the
+    BFS levels of the admissible graph) run in scipy.sparse.csgraph on
+    arrays; only the blocking flow walks the admissible arcs in Python.
+    """
+
+    def __init__(self, n, tails, heads, capacities, costs):
+        """
+        Args:
+            n: Number of nodes.
+            tails: Tail node of every edge.
+            heads: Head node of every edge.
+            capacities: Capacity of every edge.
+            costs: Cost per unit of flow of every edge (may be negative
+                if there is no negative cycle).
+        """
+        super().__init__(n, tails, heads, capacities)
+        costs = np.asarray(costs)
+        # arcs are sorted by tail, so start[] is also the CSR row pointer
+        self._arc_tail = np.repeat(np.arange(n), np.diff(self.start))
+        self._arc_head = np.asarray(self.head, dtype=np.int64)
+        self._arc_rev = np.asarray(self.rev, dtype=np.int64)
+        forward = np.asarray(self.edge_arc, dtype=np.int64)
+        self._arc_cost = np.zeros(len(self.head))
+        self._arc_cost[forward] = costs
+        self._arc_cost[self._arc_rev[forward]] = -costs
+        self.costs = costs.tolist()
+        self.potential = np.zeros(n)
+        # reduced costs are compared with a tolerance only for fractional costs
+        self.tolerance = 0 if costs.dtype.kind in 'iub' else 1e-9 * max(1.0, float(np.abs(costs).max(initial=0)))
+
+    @classmethod
+    def from_matrix(cls, arr, cost):
+        """Builds the network from dense capacity and cost matrices (``data['arr']``, ``data['cost']``)."""
+        arr = np.asarray(arr)
+        tails, heads = np.nonzero(arr > 0)
+        return cls(len(arr), tails, heads, arr[tails, heads], np.asarray(cost)[tails, heads])
+
+    def _residual(self, arcs, weights):
+        # CSR graph of the given arcs (sorted by tail); explicit zeros are edges for csgraph
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(self._arc_tail[arcs], minlength=self.n))))
+        return csr_matrix((weights, self._arc_head[arcs], indptr), shape=(self.n, self.n))
+
+    def _levels(self, graph, s):
+        # BFS depth of every node (-1 if unreachable), from the BFS tree by pointer jumping
+        order, parent = breadth_first_order(graph, s, return_predecessors=True)
+        level = np.full(self.n, -1, dtype=np.int64)
+        parent[s] = s
+        depth = (order != s).astype(np.int64)
+        jump = parent[order]
+        position = np.empty(self.n, dtype=np.int64)
+        position[order] = np.arange(len(order))
+        while (jump != s).any():
+            up = position[jump]
+            depth += np.where(jump != s, depth[up], 0)
+            jump = jump[up]
+        level[order] = depth
+        return level
+
+    def _initial_potentials(self, s):
+        # Bellman-Ford from s, needed only with negative costs; nodes that s
+        # cannot reach never lie on an augmenting path
+        arcs = np.flatnonzero(np.asarray(self.cap) > 0)
+        try:
+            dist = bellman_ford(self._residual(arcs, self._arc_cost[arcs]), indices=s)
+        except NegativeCycleError:
+            raise ValueError("negative-cost cycle in the network") from None
+        self.potential = np.where(np.isfinite(dist), dist, 0.0)
+
+    def min_cost_flow(self, s, t, limit=None):
+        """
+        Sends the maximum s-t flow (or ``limit`` units if given) at minimum
+        total cost, starting from zero flow.
+
+        Returns:
+            (flow, cost) - the value and the total cost of the flow.
+        """
+        self.reset()
+        if s == t:
+            return 0, 0
+        if any(c < 0 for c in self.costs):
+            self._initial_potentials(s)
+        else:
+            self.potential = np.zeros(self.n)
+
+        head, cap, rev, tol = self.head, self.cap, self.rev, self.tolerance
+        arc_tail, arc_head, arc_cost = self._arc_tail, self._arc_head, self._arc_cost
+        # array copy of the residual capacities, synced only on the arcs each phase touched
+        live = np.asarray(cap) > 0
+        pi = self.potential
+        total = 0
+        phases = paths = 0
+        while limit is None or total < limit:
+            arcs = np.flatnonzero(live)
+            tails, heads = arc_tail[arcs], arc_head[arcs]
+            reduced = arc_cost[arcs] + pi[tails] - pi[heads]
+            # rounding can leave tiny negative reduced costs on zero-cost cycles
+            dist = dijkstra(self._residual(arcs, np.maximum(reduced, 0.0)), indices=s)
+            bound = dist[t]
+            if not np.isfinite(bound):
+                break
+            # nodes farther than t get dist[t]: reduced costs stay nonnegative
+            pi += np.minimum(dist, bound)
+
+            # levels of the admissible subgraph and its arcs between consecutive levels
+            admissible = arcs[arc_cost[arcs] + pi[tails] - pi[heads] <= tol]
+            tails, heads = arc_tail[admissible], arc_head[admissible]
+            level = self._levels(self._residual(admissible, np.ones(len(admissible))), s)
+            step = (level[tails] >= 0) & (level[heads] == level[tails] + 1)
+            # drop dead ends up front: keep the arcs whose head still reaches t
+            back = np.argsort(heads[step], kind='stable')
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(heads[step], minlength=self.n))))
+            reverse = csr_matrix((np.ones(len(back)), tails[step][back], indptr), shape=(self.n, self.n))
+            reaches = np.zeros(self.n, dtype=bool)
+            reaches[breadth_first_order(reverse, t, return_predecessors=False)] = True
+            step &= reaches[heads]
+            arcs = admissible[step].tolist()
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(tails[step], minlength=self.n)))).tolist()
+            level = level.tolist()
+
+            # blocking flow, as in dinic(), over the admissible arcs only
+            phases += 1
+            current = bounds[:-1]
+            touched = []
+            path = []
+            u = s
+            while limit is None or total < limit:
+                if u == t:
+                    flow = min(cap[a] for a in path)
+                    if limit is not None:
+                        flow = min(flow, limit - total)
+                    for a in path:
+                        cap[a] -= flow
+                        cap[rev[a]] += flow
+                    touched.extend(path)
+                    total += flow
+                    paths += 1
+                    path = []
+                    u = s
+                    continue
+                end = bounds[u + 1]
+                i = current[u]
+                while i < end and (cap[arcs[i]] <= 0 or level[head[arcs[i]]] < 0):
+                    i += 1
+                current[u] = i
+                if i < end:
+                    a = arcs[i]
+                    path.append(a)
+                    u = head[a]
+                    continue
+                # dead end: drop the node from this phase
+                level[u] = -1
+                if not path:
+                    break
+                a = path.pop()
+                u = head[rev[a]]
+                current[u] += 1
+
+            touched = np.unique(touched)
+            touched = np.concatenate((touched, self._arc_rev[touched]))
+            live[touched] = [cap[a] > 0 for a in touched.tolist()]
+
+        self.stats = {'phases': phases, 'augmenting_paths': paths}
+        return total, sum(flow * cost for flow, cost in zip(self.edge_flows(), self.costs))
+
+
+def _reach(n, tails, heads, starts):
+    # nodes reachable from any of ``starts``: one csgraph BFS from a virtual root n
+    t = np.concatenate((tails, np.full(len(starts), n, dtype=np.int64)))
+    h = np.concatenate((heads, starts))
+    graph = csr_matrix((np.ones(len(t)), (t, h)), shape=(n + 1, n + 1))
+    seen = np.zeros(n + 1, dtype=bool)
+    seen[breadth_first_order(graph, n, return_predecessors=False)] = True
+    return seen[:n]
+
+
+class MultiTerminalFlow:
+    """
+    Maximum (or min-cost maximum) flow from a set of sources to a set of sinks.
+
+    Sources and sinks are joined by a virtual source and sink that exist only
+    in the sparse residual network, one arc per terminal. The capacity of that
+    arc is the supply (demand) of the terminal; without one it is the total
+    capacity leaving the source (entering the sink), which can never bind.
+    A node may be both a source and a sink; it then also passes up to
+    min(supply, demand) straight from the virtual source to the virtual sink.
+    With ``prune`` the nodes that no source reaches, or that reach no sink,
+    are dropped before the network is built, and the rest are renumbered.
+    """
+
+    def __init__(self, n, tails, heads, capacities, sources, sinks,
+                 supplies=None, demands=None, costs=None, prune=True, supply_costs=None, demand_costs=None):
+        """
+        Args:
+            n: Number of nodes.
+            tails: Tail node of every edge.
+            heads: Head node of every edge.
+            capacities: Capacity of every edge.
+            sources: Source nodes.
+            sinks: Sink nodes.
+            supplies: Most flow each source may send, None for no limit.
+            demands: Most flow each sink may take, None for no limit.
+            costs: Cost per unit of flow of every edge; builds a
+                MinCostFlowNetwork for ``min_cost_flow``.
+            prune: Drop nodes that cannot lie on a source-sink path.
+            supply_costs: Cost per unit of flow leaving each source, 0 if None.
+            demand_costs: Cost per unit of flow entering each sink, 0 if None.
+        """
+        tails = np.asarray(tails, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        capacities = np.asarray(capacities)
+        sources = np.asarray(sources, dtype=np.int64).reshape(-1)
+        sinks = np.asarray(sinks, dtype=np.int64).reshape(-1)
+
+        if supplies is None:
+            supplies = np.zeros(n, dtype=capacities.dtype)
+            np.add.at(supplies, tails, capacities)
+            supplies = supplies[sources]
+        if demands is None:
+            demands = np.zeros(n, dtype=capacities.dtype)
+            np.add.at(demands, heads, capacities)
+            demands = demands[sinks]
+        supplies = np.asarray(supplies)
+        demands = np.asarray(demands)
+
+        useful = capacities > 0
+        if prune:
+            forward = _reach(n, tails[useful], heads[useful], sources)
+            backward = _reach(n, heads[useful], tails[useful], sinks)
+            # tail reached from a source and head reaching a sink: the edge
+            # lies on some source-sink path, and so do both of its ends
+            useful &= forward[tails] & backward[heads]
+        keep = np.zeros(n, dtype=bool)
+        keep[tails[useful]] = True
+        keep[heads[useful]] = True
+        keep[np.intersect1d(sources, sinks)] = True
+        local = np.full(n, -1, dtype=np.int64)
+        local[keep] = np.arange(int(keep.sum()))
+        k = int(keep.sum())
+
+        self.n = n
+        self.sources = sources.tolist()
+        self.sinks = sinks.tolist()
+        self._edges = np.flatnonzero(useful)
+        self._source_index = np.flatnonzero(keep[sources])
+        self._sink_index = np.flatnonzero(keep[sinks])
+        self._m = len(tails)
+        # virtual source k and virtual sink k + 1
+        self.source, self.sink = k, k + 1
+        net_tails = np.concatenate((local[tails[useful]], np.full(len(self._source_index), k, dtype=np.int64),
+                                    local[sinks[self._sink_index]]))
+        net_heads = np.concatenate((local[heads[useful]], local[sources[self._source_index]],
+                                    np.full(len(self._sink_index), k + 1, dtype=np.int64)))
+        net_caps = np.concatenate((capacities[useful], supplies[self._source_index], demands[self._sink_index]))
+        if costs is None:
+            self.network = FlowNetwork(k + 2, net_tails, net_heads, net_caps)
+        else:
+            costs = np.asarray(costs)
+            if supply_costs is None:
+                supply_costs = np.zeros(len(sources), dtype=costs.dtype)
+            if demand_costs is None:
+                demand_costs = np.zeros(len(sinks), dtype=costs.dtype)
+            supply_costs = np.asarray(supply_costs)
+            demand_costs = np.asarray(demand_costs)
+            net_costs = np.concatenate((costs[useful], supply_costs[self._source_index],
+                                        demand_costs[self._sink_index]))
+            self.network = MinCostFlowNetwork(k + 2, net_tails, net_heads, net_caps, net_costs)
+        self._dtype = net_caps.dtype
+        self.stats = {'nodes': k, 'edges': len(self._edges),
+                      'pruned_nodes': n - k, 'pruned_edges': self._m - len(self._edges)}
+
+    @classmethod
+    def from_matrix(cls, arr, sources, sinks, supplies=None, demands=None, cost=None, prune=True):
+        """Builds the flow from dense capacity (and cost) matrices (``data['arr']`` format)."""
+        arr = np.asarray(arr)
+        tails, heads = np.nonzero(arr > 0)
+        costs = None if cost is None else np.asarray(cost)[tails, heads]
+        return cls(len(arr), tails, heads, arr[tails, heads], sources, sinks, supplies, demands, costs, prune)
+
+    def max_flow(self, method='dinic'):
+        """
+        Returns:
+            The maximum flow value from all sources to all sinks.
+        """
+        value = self.network.max_flow(self.source, self.sink, method)
+        self.stats.update(self.network.stats)
+        return value
+
+    def min_cost_flow(self, limit=None):
+        """
+        Min-cost max flow (needs ``costs``); the terminal arcs cost
+        ``supply_costs``/``demand_costs``.
+
+        Returns:
+            (flow, cost)
+        """
+        result = self.network.min_cost_flow(self.source, self.sink, limit)
+        self.stats.update(self.network.stats)
+        return result
+
+    def edge_flows(self):
+        """Flow on every given edge (zero on pruned edges)."""
+        network_flows = self.network.edge_flows()
+        flows = np.zeros(self._m, dtype=self._dtype)
+        flows[self._edges] = network_flows[:len(self._edges)]
+        return flows
+
+    def terminal_flows(self):
+        """
+        Returns:
+            (source_flows, sink_flows): flow leaving every source and entering
+            every sink, in the order they were given.
+        """
+        network_flows = self.network.edge_flows()
+        source_flows = np.zeros(len(self.sources), dtype=self._dtype)
+        sink_flows = np.zeros(len(self.sinks), dtype=self._dtype)
+        first = len(self._edges)
+        source_flows[self._source_index] = network_flows[first:first + len(self._source_index)]
+        sink_flows[self._sink_index] = network_flows[first + len(self._source_index):]
+        return source_flows, sink_flows
+
+
+def super_terminals(n, tails, heads, capacities, source=0, sink=None):
+    """
+    Reads a multi-terminal specification out of a super-source/super-sink
+    network (the layout of older ``data.json`` files and of data_io).
+
+    A node fed by the super-source that also feeds the super-sink becomes
+    both a source and a sink. Direct super-source -> super-sink edges are
+    left out of the specification: every maximum flow saturates them, so
+    their capacity adds straight to the flow value.
+
+    Returns:
+        (real, sources, sinks, supplies, demands, direct): mask of the edges
+        not touching the super nodes, the nodes fed by the super-source and
+        feeding the super-sink, the capacities of those super edges and the
+        mask of the direct edges.
+    """
+    sink = n - 1 if sink is None else sink
+    tails = np.asarray(tails)
+    heads = np.asarray(heads)
+    capacities = np.asarray(capacities)
+    positive = capacities > 0
+    direct = (tails == source) & (heads == sink) & positive
+    out = (tails == source) & (heads != sink) & positive
+    into = (heads == sink) & (tails != source) & positive
+    real = (tails != source) & (heads != source) & (tails != sink) & (heads != sink)
+    return real, heads[out], tails[into], capacities[out], capacities[into], direct
+
+
+def max_flow(arr, source=0, sink=None, method='dinic'):
+    """
+    Drop-in replacement for ``Graph(arr).FordFulkerson()``.
+
+    Returns:
+        (max_flow, residual) with the residual graph as a dense matrix.
+    """
+    network = FlowNetwork.from_matrix(arr)
+    flow = network.max_flow(source, network.n - 1 if sink is None else sink, method)
+    return flow, network.residual_matrix()
+
+
+def min_cut(arr, source=0, sink=None, method='dinic'):
+    """
+    Returns:
+        (max_flow, source_side, cut_edges) for the graph given as a capacity
+        matrix.
+    """
+    network = FlowNetwork.from_matrix(arr)
+    flow = network.max_flow(source, network.n - 1 if sink is None else sink, method)
+    return (flow,) + network.min_cut(source)
+
+
+_worker_network = None
+
+
+def _init_worker(n, tails, heads, capacities):
+    global _worker_network
+    _worker_network = FlowNetwork(n, tails, heads, capacities)
+
+
+def _solve_pair(task):
+    s, t, method = task
+    _worker_network.reset()
+    return s, t, _worker_network.max_flow(s, t, method)
+
+
+def batch_max_flow(arr, pairs, method='dinic', workers=None):
+    """
+    Max flow for many (source, sink) pairs of one graph, spread across a
+    process pool. Each worker builds the network once and resets the flow
+    between queries.
+
+    Returns:
+        {(source, sink): max_flow}
+    """
+    network = FlowNetwork.from_matrix(arr)
+    tasks = [(s, t, method) for s, t in pairs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(network.n, network.tails, network.heads, network.capacity)) as pool:
+        return {(s, t): flow for s, t, flow in pool.map(_solve_pair, tasks, chunksize=max(1, len(tasks) // 64))}
+
+
+def multi_sink_flows(arr, source, sinks, method='dinic', workers=None):
+    """Max flow from one source to each of the given sinks: {sink: max_flow}."""
+    flows = batch_max_flow(arr, [(source, t) for t in sinks], method, workers)
+    return {t: flows[(source, t)] for t in sinks}
+
+
+class GomoryHuTree:
+    """
+    Gomory-Hu cut tree of the undirected graph behind a capacity matrix
+    (the capacity of {u, v} is arr[u][v] + arr[v][u]).
+
+    Built with Gusfield's algorithm from n - 1 max-flow calls. The minimum
+    cut between any two nodes is the lightest edge on their tree path.
+    """
+
+    def __init__(self, arr, method='dinic'):
+        arr = np.asarray(arr)
+        n = len(arr)
+        undirected = np.triu(arr + arr.T, 1)
+        tails, heads = np.nonzero(undirected)
+        weights = undirected[tails, heads]
+        # every undirected edge becomes two opposite arcs with the full capacity
+        network = FlowNetwork(n, np.concatenate((tails, heads)), np.concatenate((heads, tails)),
+                              np.concatenate((weights, weights)))
+
+        parent = [0] * n
+        weight = [0] * n
+        for s in range(1, n):
+            t = parent[s]
+            network.reset()
+            weight[s] = network.max_flow(s, t, method)
+            source_side, _ = network.min_cut(s)
+            for v in range(n):
+                if v != s and v != 0 and v in source_side and parent[v] == t:
+                    parent[v] = s
+            if t != 0 and parent[t] in source_side:
+                parent[s] = parent[t]
+                parent[t] = s
+                weight[s], weight[t] = weight[t], weight[s]
+
+        self.n = n
+        self.parent = parent
+        self.weight = weight
+        self._table = None
+
+    def edges(self):
+        """Tree edges (v, parent, min cut value)."""
+        return [(v, self.parent[v], self.weight[v]) for v in range(1, self.n)]
+
+    def min_cut_value(self, u, v):
+        """Minimum u-v cut; O(1) once the all-pairs table is built."""
+        if u == v:
+            return 0
+        return self.all_pairs()[u][v]
+
+    def all_pairs(self):
+        """All-pairs minimum cut values, from one tree walk per node."""
+        if self._table is None:
+            adjacency = [[] for _ in range(self.n)]
+            for v, p, w in self.edges():
+                adjacency[v].append((p, w))
+                adjacency[p].append((v, w))
+            table = []
+            for root in range(self.n):
+                best = [0] * self.n
+                best[root] = float('inf')
+                stack = [root]
+                seen = [False] * self.n
+                seen[root] = True
+                while stack:
+                    u = stack.pop()
+                    for v, w in adjacency[u]:
+                        if not seen[v]:
+                            seen[v] = True
+                            best[v] = min(best[u], w)
+                            stack.append(v)
+                best[root] = 0
+                table.append(best)
+            self._table = table
+        return self._table
+
+
+class MaxFlowSession:
+    """
+    Keeps a maximum flow and its residual network between capacity edits, so
+    what-if queries repair the current flow instead of solving from zero.
+    """
+
+    def __init__(self, arr, source=0, sink=None, method='dinic'):
+        self.network = FlowNetwork.from_matrix(arr)
+        self.source = source
+        self.sink = self.network.n - 1 if sink is None else sink
+        self.method = method
+        self.flow = self.network.max_flow(self.source, self.sink, method)
+
+    def set_capacity(self, u, v, capacity):
+        """
+        Changes the capacity of the edge u -> v and restores a maximum flow.
+
+        Returns:
+            The new maximum flow value.
+        """
+        return self.update({(u, v): capacity})
+
+    def update(self, capacities):
+        """
+        Applies several capacity changes ``{(u, v): capacity}`` and restores a
+        maximum flow with a single augmentation pass.
+
+        Returns:
+            The new maximum flow value.
+        """
+        new_edges = {}
+        for (u, v), capacity in capacities.items():
+            e = self.network.edge(u, v)
+            if e is None:
+                if capacity > 0:
+                    new_edges[(u, v)] = capacity
+            else:
+                self._change_edge(e, capacity)
+        if new_edges:
+            self._add_edges(new_edges)
+        self.flow += self.network.max_flow(self.source, self.sink, self.method)
+        return self.flow
+
+    def _change_edge(self, e, capacity):
+        network = self.network
+        cap, rev = network.cap, network.rev
+        a = network.edge_arc[e]
+        flow = cap[rev[a]]
+        network.capacity[e] = capacity
+        if capacity >= flow:
+            cap[a] = capacity - flow
+            return
+
+        # the edge now carries too much: u keeps a surplus, v gets a deficit
+        u, v = network.tails[e], network.heads[e]
+        surplus = flow - capacity
+        cap[a] = 0
+        cap[rev[a]] = capacity
+
+        # first try to route the surplus around the edge
+        surplus -= network.augment(u, v, surplus)
+        if surplus:
+            # otherwise cancel it back to the source and from the sink
+            network.augment(u, self.source, surplus)
+            network.augment(self.sink, v, surplus)
+            self.flow -= surplus
+
+    def _add_edges(self, new_edges):
+        old = self.network
+        flows = old.edge_flows()
+        tails = old.tails + [u for u, _ in new_edges]
+        heads = old.heads + [v for _, v in new_edges]
+        capacities = old.capacity + list(new_edges.values())
+        network = FlowNetwork(old.n, tails, heads, capacities)
+        for e, flow in enumerate(flows):
+            a = network.edge_arc[e]
+            network.cap[a] -= flow
+            network.cap[network.rev[a]] = flow
+        self.network = network
+
+    def residual_matrix(self):
+        return self.network.residual_matrix()
@@ -1,7 +1,18 @@
-import graphviz as gz
+import sys
+from pathlib import Path
+
+from collections import deque
 from random import random, randint
 from json import dumps, loads
 
+import numpy as np
+
+from flow import MultiTerminalFlow, super_terminals
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling, render
+from utils.cache import cached
+
 
 class Graph:
     def __init__(self, graph):
@@ -21,18 +32,20 @@ class Graph:
             True if an augmenting path is found, False otherwise.
         """
         visited = [False] * self.ROW
-        queue = [s]
+        queue = deque([s])
         visited[s] = True
 
         while queue:
-            u = queue.pop(0)
+            u = queue.popleft()
             for ind, val in enumerate(self.graph[u]):
                 if not visited[ind] and val > 0:
                     queue.append(ind)
                     visited[ind] = True
                     parent[ind] = u
+                    if ind == t:
+                        return True
 
-        return True if visited[t] else False
+        return False
 
     def FordFulkerson(self):
         source = 0
@@ -48,6 +61,7 @@ class Graph:
                 s = parent[s]
 
             max_flow += path_flow
+            profiling.count('augmenting_paths')
 
             v = sink
             while v != source:
@@ -62,29 +76,25 @@ class Graph:
 def gen_data(N, chance, inputs, outputs):
     assert inputs + outputs <= N
     chance = min(max(chance, 0.0), 1.0)
-    arr = [[0 for _ in range(N + 2)]]
+    arr = [[0 for _ in range(N)] for _ in range(N)]
+    cost = [[0 for _ in range(N)] for _ in range(N)]
     n = 0
     for i in range(N):
-        a = [0]
         for j in range(N):
             if (i != j) and (j >= inputs) and (i < N - outputs) and (random() < chance):
-                a.append(randint(1, 20))
+                arr[i][j] = randint(1, 20)
+                cost[i][j] = randint(1, 10)
                 n += 1
-            else:
-                a.append(0)
-        a.append(0)
-        arr.append(a)
-    arr.append([0 for _ in range(N + 2)])
-    for i in range(inputs):
-        arr[0][i + 1] = 9999
-    for i in range(outputs):
-        arr[N - i][N + 1] = 9999
     print(f'edges: {n}')
-    names = ["INPUTS"] + [f"{i + 1}" for i in range(N)] + ["OUTPUTS"]
+    # входы и выходы задаются списками вершин (без супер-истока и супер-стока);
+    # необязательные 'supplies'/'demands' ограничивают поток через каждую из них
     with open('data.json', 'w') as file:
         file.write(dumps({
             'arr': arr,
-            'names': names,
+            'cost': cost,
+            'names': [f"{i + 1}" for i in range(N)],
+            'sources': list(range(inputs)),
+            'sinks': [N - 1 - i for i in range(outputs)],
             'inputs': inputs,
             'outputs': outputs
         }))
@@ -95,23 +105,78 @@ def load_data():
         return loads(file.read())
 
 
-def show_graph(data, name):
+# отрисовка, см. utils/render.py; вес дуги - поток в решении или пропускная способность
+def show_graph(data, name, **limits):
     N = len(data['arr'])
-
-    graph = gz.Digraph(name)
-
-    for name in data['names']:
-        graph.node(name)
-
-    for i in range(N):
-        for j in range(N):
-            if data['arr'][i][j]:
-                graph.edge(data['names'][i], data['names'][j], f"{data['arr'][i][j]}")
-
-    graph.render(directory='d_render', view=True)
-
-
-def solve(data):
+    edges = [(data['names'][i], data['names'][j], float(str(data['arr'][i][j]).split('/')[0]),
+              {'label': f"{data['arr'][i][j]}"})
+             for i in range(N) for j in range(N) if data['arr'][i][j]]
+    render.graphviz(name, data['names'], edges, **limits)
+
+
+def _flow(data, with_cost=False, prune=True):
+    """
+    Multi-terminal flow of a ``data.json`` dictionary.
+
+    Sources and sinks come from the ``sources``/``sinks`` lists (with
+    optional ``supplies``/``demands``). Older files have none and wire a
+    super-source (row 0) and a super-sink (column N - 1) instead; their
+    inputs and outputs are read from those rows and the super nodes are
+    left out of the network. A direct super-source -> super-sink edge is
+    always saturated and is added to the flow by ``solve``.
+
+    Returns:
+        (tails, heads, capacities, flow, super_edges) - all edges of ``arr``,
+        the MultiTerminalFlow over the real ones and, for older files, the
+        mask of the real edges with the indices of the super-source,
+        super-sink and direct edges.
+    """
+    arr = np.asarray(data['arr'])
+    tails, heads = np.nonzero(arr > 0)
+    capacities = arr[tails, heads]
+    costs = np.asarray(data['cost'])[tails, heads] if with_cost else None
+    if 'sources' in data:
+        real = np.ones(len(tails), dtype=bool)
+        sources, sinks = data['sources'], data['sinks']
+        supplies, demands = data.get('supplies'), data.get('demands')
+        super_edges = None
+    else:
+        real, sources, sinks, supplies, demands, direct = super_terminals(len(arr), tails, heads, capacities)
+        super_edges = (real, np.flatnonzero((tails == 0) & ~direct),
+                       np.flatnonzero((heads == len(arr) - 1) & ~direct), np.flatnonzero(direct))
+    if costs is None:
+        flow = MultiTerminalFlow(len(arr), tails[real], heads[real], capacities[real], sources, sinks,
+                                 supplies, demands, prune=prune)
+    else:
+        # у старых файлов стоимость есть и у дуг супер-истока и супер-стока
+        terminal_costs = (None, None) if super_edges is None else (costs[super_edges[1]], costs[super_edges[2]])
+        flow = MultiTerminalFlow(len(arr), tails[real], heads[real], capacities[real], sources, sinks,
+                                 supplies, demands, costs[real], prune, *terminal_costs)
+    return tails, heads, capacities, flow, super_edges
+
+
+def _with_super_nodes(data):
+    """
+    Capacity matrix of ``data`` in the older layout: super-source 0 and
+    super-sink N + 1 around the N real nodes. The super edges carry the
+    ``supplies``/``demands`` or, without them, the total capacity leaving
+    the source (entering the sink), as in MultiTerminalFlow.
+    """
+    arr = np.asarray(data['arr'])
+    N = len(arr)
+    sources = np.asarray(data['sources'], dtype=np.int64)
+    sinks = np.asarray(data['sinks'], dtype=np.int64)
+    capacities = arr.clip(min=0)
+    supplies = data.get('supplies')
+    demands = data.get('demands')
+    padded = np.zeros((N + 2, N + 2), dtype=arr.dtype)
+    padded[1:-1, 1:-1] = arr
+    padded[0, sources + 1] = capacities.sum(axis=1)[sources] if supplies is None else supplies
+    padded[sinks + 1, N + 1] = capacities.sum(axis=0)[sinks] if demands is None else demands
+    return padded.tolist()
+
+
+def _extract(data, tails, heads, capacities, flow, super_edges):
     N = len(data['arr'])
     solution = {
         'names': data['names'].copy(),
@@ -123,19 +188,105 @@ def solve(data):
         'arr': [['' for _ in range(N)] for __ in range(N)]
     }
 
-    g = Graph(data['arr'].copy())
-    max_flow, graph = g.FordFulkerson()
-    for i in range(N):
-        for j in range(N):
-            if data['arr'][i][j]:
-                solution['arr'][i][j] = f"{data['arr'][i][j]-graph[i][j]}/{data['arr'][i][j]}"
-                if graph[i][j] != data['arr'][i][j]:
-                    clean['arr'][i][j] = f"{data['arr'][i][j]-graph[i][j]}/{data['arr'][i][j]}"
-
-    return solution, clean, max_flow
-
-
-def main():
+    flows = np.zeros(len(tails), dtype=capacities.dtype)
+    if super_edges is None:
+        flows[:] = flow.edge_flows()
+    else:
+        real, out, into, direct = super_edges
+        flows[real] = flow.edge_flows()
+        flows[out], flows[into] = flow.terminal_flows()
+        flows[direct] = capacities[direct]
+    for i, j, capacity, f in zip(tails.tolist(), heads.tolist(), capacities.tolist(), flows.tolist()):
+        solution['arr'][i][j] = f"{f}/{capacity}"
+        if f:
+            clean['arr'][i][j] = f"{f}/{capacity}"
+    return solution, clean
+
+
+@cached('t2.solve')
+def solve(data, method='dinic'):
+    with profiling.span('t2.solve'):
+        N = len(data['arr'])
+        if method == 'ford-fulkerson':
+            # эталонная реализация ищет пути от вершины 0 к последней вершине:
+            # для списков sources/sinks строится матрица с супер-истоком и супер-стоком
+            arr = _with_super_nodes(data) if 'sources' in data else data['arr']
+            shift = 1 if 'sources' in data else 0
+            solution = {
+                'names': data['names'].copy(),
+                'arr': [['' for _ in range(N)] for __ in range(N)]
+            }
+
+            clean = {
+                'names': data['names'].copy(),
+                'arr': [['' for _ in range(N)] for __ in range(N)]
+            }
+
+            with profiling.span('build'):
+                g = Graph(arr)
+            with profiling.span('solve'):
+                max_flow, graph = g.FordFulkerson()
+            with profiling.span('extract'):
+                for i in range(N):
+                    for j in range(N):
+                        capacity = data['arr'][i][j]
+                        if capacity:
+                            residual = graph[i + shift][j + shift]
+                            solution['arr'][i][j] = f"{capacity-residual}/{capacity}"
+                            if residual != capacity:
+                                clean['arr'][i][j] = f"{capacity-residual}/{capacity}"
+            return solution, clean, max_flow
+
+        with profiling.span('build'):
+            tails, heads, capacities, flow, super_edges = _flow(data)
+            for name in ('nodes', 'edges', 'pruned_nodes', 'pruned_edges'):
+                profiling.count(name, flow.stats[name])
+        with profiling.span('solve'):
+            max_flow = flow.max_flow(method)
+            if super_edges is not None:
+                max_flow += sum(capacities[super_edges[3]].tolist())
+            for name, value in flow.network.stats.items():
+                profiling.count(name, value)
+        with profiling.span('extract'):
+            solution, clean = _extract(data, tails, heads, capacities, flow, super_edges)
+
+        return solution, clean, max_flow
+
+
+@cached('t2.solve_min_cost')
+def solve_min_cost(data):
+    """
+    Min-cost max flow from the sources to the sinks of ``data``.
+
+    Args:
+        data: ``data.json`` dictionary with an extra ``cost`` matrix
+            (cost per unit of flow of every edge of ``arr``).
+
+    Returns:
+        (solution, clean, max_flow, total_cost) - the first three in the
+        same format as ``solve``.
+    """
+    with profiling.span('t2.solve_min_cost'):
+        with profiling.span('build'):
+            tails, heads, capacities, flow, super_edges = _flow(data, with_cost=True)
+            for name in ('nodes', 'edges', 'pruned_nodes', 'pruned_edges'):
+                profiling.count(name, flow.stats[name])
+        with profiling.span('solve'):
+            max_flow, total_cost = flow.min_cost_flow()
+            if super_edges is not None:
+                direct = super_edges[3]
+                max_flow += sum(capacities[direct].tolist())
+                direct_costs = np.asarray(data['cost'])[tails[direct], heads[direct]]
+                total_cost += sum((capacities[direct] * direct_costs).tolist())
+            for name, value in flow.network.stats.items():
+                profiling.count(name, value)
+        with profiling.span('extract'):
+            solution, clean = _extract(data, tails, heads, capacities, flow, super_edges)
+
+        return solution, clean, max_flow, total_cost
+
+
+def main(draw=True, **limits):
     if input('new data?(y/n): ').lower() == 'y':
         gen_data(
             int(input('N: ')),
@@ -144,14 +295,26 @@ def main():
             int(input('outputs: ')),
         )
     data = load_data()
-    show_graph(data, 'data')
+    if draw:
+        with profiling.span('render'):
+            show_graph(data, 'data', **limits)
 
     solution, clean, flow = solve(data)
-    show_graph(solution, 'solution')
-    show_graph(clean, 'clean')
+    if draw:
+        with profiling.span('render'):
+            show_graph(solution, 'solution', **limits)
+            show_graph(clean, 'clean', **limits)
 
     print(f"max flow: {flow}")
 
+    # стоимость перевозки есть только в данных с матрицей cost
+    if 'cost' in data:
+        solution, clean, flow, cost = solve_min_cost(data)
+        if draw:
+            with profiling.span('render'):
+                show_graph(clean, 'min_cost', **limits)
+        print(f"min cost: {cost}")
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,235 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+
+
+# Индексация переменных:
+# x[k]      -> k
+# y[k, e]   -> num_products + k * num_arcs + e, где e - номер дуги d[i, j] > 0
+# Дуги нумеруются построчно (как в обходе for i: for j:), поэтому порядок
+# переменных совпадает в плотной и разреженной сборке.
+def arc_list(d):
+    arc_i, arc_j = np.nonzero(np.asarray(d) > 0)
+    return arc_i, arc_j
+
+
+def build_dense(p, b, A, d, Q, c, num_nodes, source_node, consumers):
+    num_raw_materials = len(b)
+    num_products = len(p)
+
+    num_x = num_products
+    num_y = num_products * np.count_nonzero(d)
+    total_vars = num_x + num_y
+
+    # Целевая функция: -доход + транспортные расходы
+    c_obj = np.zeros(total_vars)
+    c_obj[:num_x] = -np.array(p)
+
+    y_idx = 0
+    for k in range(num_products):
+        for i in range(num_nodes):
+            for j in range(num_nodes):
+                if d[i, j] > 0:
+                    c_obj[num_x + y_idx] = c[i, j] / max(d[i, j], 1e-6)  # переменные затраты
+                    y_idx += 1
+
+    A_ub = []  # неравенства
+    b_ub = []
+    A_eq = []  # равенства
+    b_eq = []
+
+    # Ограничения по сырью (A*x <= b)
+    for l in range(num_raw_materials):
+        row = np.zeros(total_vars)
+        row[:num_x] = A[l]
+        A_ub.append(row)
+        b_ub.append(b[l])
+
+    # Ограничения по спросу (для каждого потребителя и товара)
+    for consumer, demand_dict in Q.items():
+        consumer_node = consumers[consumer]
+        for k, quantity in demand_dict.items():
+            if quantity > 0:
+                # Сумма входящих потоков <= спроса (можем удовлетворить частично)
+                row = np.zeros(total_vars)
+                y_idx = 0
+                for k2 in range(num_products):
+                    for i in range(num_nodes):
+                        for j in range(num_nodes):
+                            if d[i, j] > 0:
+                                if k2 == k and j == consumer_node:
+                                    row[num_x + y_idx] = 1  # sum(y) <= запрос
+                                y_idx += 1
+                A_ub.append(row)
+                b_ub.append(quantity)
+
+    # Баланс потоков для каждого товара и узла
+    for k in range(num_products):
+        for node in range(num_nodes):
+            if node == source_node:
+                # Производство = исходящий поток
+                row = np.zeros(total_vars)
+                row[k] = -1  # -x[k]
+
+                y_idx = 0
+                for k2 in range(num_products):
+                    for i in range(num_nodes):
+                        for j in range(num_nodes):
+                            if d[i, j] > 0:
+                                if k2 == k and i == source_node:
+                                    row[num_x + y_idx] = 1  # sum(y)
+                                y_idx += 1
+                A_eq.append(row)
+                b_eq.append(0)
+            elif node in consumers.values():
+                continue  # уже обработали в спросе
+            else:
+                # Входящий поток = исходящий для промежуточных узлов
+                row = np.zeros(total_vars)
+                y_idx = 0
+                for k2 in range(num_products):
+                    for i in range(num_nodes):
+                        for j in range(num_nodes):
+                            if d[i, j] > 0:
+                                if k2 == k:
+                                    if j == node:
+                                        row[num_x + y_idx] = 1  # inflow
+                                    if i == node:
+                                        row[num_x + y_idx] = -1  # outflow
+                                y_idx += 1
+                A_eq.append(row)
+                b_eq.append(0)
+
+    # Ограничения пропускной способности
+    for i in range(num_nodes):
+        for j in range(num_nodes):
+            if d[i, j] > 0:
+                row = np.zeros(total_vars)
+                y_idx = 0
+                for k in range(num_products):
+                    for i2 in range(num_nodes):
+                        for j2 in range(num_nodes):
+                            if d[i2, j2] > 0:
+                                if i2 == i and j2 == j:
+                                    row[num_x + y_idx] = 1  # sum(y) <= d[i,j]
+                                y_idx += 1
+                A_ub.append(row)
+                b_ub.append(d[i, j])
+
+    A_ub = np.array(A_ub) if len(A_ub) > 0 else None
+    b_ub = np.array(b_ub) if len(b_ub) > 0 else None
+    A_eq = np.array(A_eq) if len(A_eq) > 0 else None
+    b_eq = np.array(b_eq) if len(b_eq) > 0 else None
+
+    return c_obj, A_ub, b_ub, A_eq, b_eq
+
+
+def _segments(keys, num_nodes):
+    # группировка дуг по узлу: order[start[n]:start[n]+count[n]] - дуги узла n
+    order = np.argsort(keys, kind='stable')
+    count = np.bincount(keys, minlength=num_nodes)
+    start = np.concatenate(([0], np.cumsum(count)[:-1]))
+    return order, start, count
+
+
+def _expand(order, start, count, nodes):
+    # для каждого узла из nodes - список его дуг, склеенный в один массив;
+    # возвращает (номер строки, номер дуги)
+    lengths = count[nodes]
+    rows = np.repeat(np.arange(len(nodes)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    arcs = order[np.repeat(start[nodes], lengths) + offsets]
+    return rows, arcs
+
+
+def build_sparse(p, b, A, d, Q, c, num_nodes, source_node, consumers):
+    num_raw_materials = len(b)
+    num_products = len(p)
+    d = np.asarray(d)
+    c = np.asarray(c)
+
+    arc_i, arc_j = arc_list(d)
+    num_arcs = len(arc_i)
+    num_x = num_products
+    total_vars = num_x + num_products * num_arcs
+    product_offsets = num_x + np.arange(num_products) * num_arcs
+
+    # Целевая функция
+    arc_cost = c[arc_i, arc_j] / np.maximum(d[arc_i, arc_j], 1e-6)
+    c_obj = np.concatenate((-np.asarray(p, dtype=float), np.tile(arc_cost, num_products)))
+
+    rows, cols, vals = [], [], []
+    b_ub = []
+
+    # Ограничения по сырью (A*x <= b)
+    A = np.asarray(A, dtype=float)
+    raw_l, raw_k = np.nonzero(A)
+    rows.append(raw_l)
+    cols.append(raw_k)
+    vals.append(A[raw_l, raw_k])
+    b_ub.append(np.asarray(b, dtype=float))
+    row_offset = num_raw_materials
+
+    # Ограничения по спросу: сумма входящих в узел потребителя потоков товара k <= спроса
+    demand = [(consumers[consumer], k, quantity)
+              for consumer, demand_dict in Q.items()
+              for k, quantity in demand_dict.items() if quantity > 0]
+    if demand:
+        dem_node, dem_k, dem_q = (np.array(v) for v in zip(*demand))
+        in_order, in_start, in_count = _segments(arc_j, num_nodes)
+        dem_rows, dem_arcs = _expand(in_order, in_start, in_count, dem_node)
+        rows.append(row_offset + dem_rows)
+        cols.append(product_offsets[dem_k[dem_rows]] + dem_arcs)
+        vals.append(np.ones(len(dem_rows)))
+        b_ub.append(dem_q.astype(float))
+        row_offset += len(demand)
+
+    # Ограничения пропускной способности: sum_k y[k, e] <= d[e]
+    arcs = np.arange(num_arcs)
+    rows.append(row_offset + np.tile(arcs, num_products))
+    cols.append((product_offsets[:, None] + arcs).ravel())
+    vals.append(np.ones(num_products * num_arcs))
+    b_ub.append(d[arc_i, arc_j].astype(float))
+    row_offset += num_arcs
+
+    A_ub = coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(row_offset, total_vars)).tocsr()
+    b_ub = np.concatenate(b_ub)
+
+    # Баланс потоков: строки (k, узел) для источника и промежуточных узлов
+    consumer_nodes = set(consumers.values())
+    balance_nodes = np.array([n for n in range(num_nodes)
+                              if n == source_node or n not in consumer_nodes], dtype=int)
+    num_balance = len(balance_nodes)
+    if num_products == 0 or num_balance == 0:
+        return c_obj, A_ub, b_ub, None, None
+
+    node_row = np.full(num_nodes, -1)
+    node_row[balance_nodes] = np.arange(num_balance)
+    product_rows = np.arange(num_products)[:, None] * num_balance
+
+    # исходящие дуги: +1 в строке источника, -1 в строках промежуточных узлов
+    out_arcs = np.flatnonzero(node_row[arc_i] >= 0)
+    out_vals = np.where(arc_i[out_arcs] == source_node, 1.0, -1.0)
+    # входящие дуги промежуточных узлов: +1 (петли учитываются только как исходящие)
+    in_arcs = np.flatnonzero((node_row[arc_j] >= 0) & (arc_j != source_node) & (arc_i != arc_j))
+
+    eq_rows = [
+        (product_rows + node_row[arc_i[out_arcs]]).ravel(),
+        (product_rows + node_row[arc_j[in_arcs]]).ravel(),
+        product_rows.ravel() + node_row[source_node],
+    ]
+    eq_cols = [
+        (product_offsets[:, None] + out_arcs).ravel(),
+        (product_offsets[:, None] + in_arcs).ravel(),
+        np.arange(num_products),
+    ]
+    eq_vals = [
+        np.tile(out_vals, num_products),
+        np.ones(num_products * len(in_arcs)),
+        -np.ones(num_products),
+    ]
+    A_eq = coo_matrix((np.concatenate(eq_vals), (np.concatenate(eq_rows), np.concatenate(eq_cols))),
+                      shape=(num_products * num_balance, total_vars)).tocsr()
+    b_eq = np.zeros(num_products * num_balance)
+
+    return c_obj, A_ub, b_ub, A_eq, b_eq
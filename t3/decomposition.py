@@ -0,0 +1,169 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from assembly import arc_list
+from results import collect_results
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.cache import cached
+
+
+# Декомпозиция Данцига-Вулфа по товарам: вместо переменных y[k, e] на каждой
+# паре (товар, дуга) главная задача содержит потоки по путям, а пути
+# добавляются по мере надобности (генерация столбцов).
+#
+# Путь товара k идет из узла производства в "свободный сток": узел
+# потребителя (для них нет балансовых ограничений) или обратно в узел
+# производства. Входящие в источник дуги перенаправлены в фиктивную вершину
+# num_nodes, поэтому пути не проходят через источник повторно.
+#
+# Строки главной задачи совпадают с A_ub из build_sparse: сырье, спрос,
+# пропускная способность. x[k] равен сумме потоков по путям товара k.
+
+
+class _Pricing:
+    # подзадача товара k: кратчайший путь по приведенным стоимостям дуг
+    def __init__(self, d, c, num_nodes, source_node, consumers):
+        d = np.asarray(d)
+        self.arc_i, self.arc_j = arc_list(d)
+        self.num_arcs = len(self.arc_i)
+        self.num_nodes = num_nodes
+        self.source_node = source_node
+        self.arc_cost = np.asarray(c)[self.arc_i, self.arc_j] / np.maximum(d[self.arc_i, self.arc_j], 1e-6)
+
+        self.heads = np.where(self.arc_j == source_node, num_nodes, self.arc_j)
+        self.sinks = np.array(sorted(set(consumers.values()) - {source_node}) + [num_nodes])
+        # номер дуги по паре (хвост, голова) в графе с фиктивной вершиной
+        self.arc_index = {(i, j): e for e, (i, j) in enumerate(zip(self.arc_i.tolist(), self.heads.tolist()))}
+
+    def shortest_paths(self, weights):
+        # явные нули csgraph считает дугами, так что бесплатные дуги не теряются
+        graph = csr_matrix((np.maximum(weights, 0), (self.arc_i, self.heads)),
+                           shape=(self.num_nodes + 1, self.num_nodes + 1))
+        dist, pred = dijkstra(graph, indices=self.source_node, return_predecessors=True)
+        return dist, pred
+
+    def path(self, pred, sink):
+        arcs = []
+        node = sink
+        while node != self.source_node:
+            prev = pred[node]
+            arcs.append(self.arc_index[prev, node])
+            node = prev
+        return arcs[::-1]
+
+
+@cached('t3.optimize_production_transport_colgen', ignore=('workers',))
+def optimize_production_transport_colgen(
+        p, b, A, d, Q, c, nodes, source_node, consumers,
+        workers=None,  # потоков для подзадач (1 - последовательно)
+        columns_per_product=5,  # сколько лучших путей товара добавлять за итерацию
+        max_iterations=1000,
+        tolerance=1e-9
+):
+    """
+    Та же задача, что и optimize_production_transport_linprog, решенная
+    генерацией столбцов; результат - тот же словарь results.
+    """
+    num_raw_materials = len(b)
+    num_products = len(p)
+    num_nodes = len(nodes)
+    A = np.asarray(A, dtype=float)
+    pricing = _Pricing(d, c, num_nodes, source_node, consumers)
+    num_arcs = pricing.num_arcs
+
+    # строки спроса в порядке build_sparse; (узел, товар) -> строки
+    demand = [(consumers[consumer], k, quantity)
+              for consumer, demand_dict in Q.items()
+              for k, quantity in demand_dict.items() if quantity > 0]
+    demand_rows = [{} for _ in range(num_products)]  # по товару: узел -> строки
+    for row, (node, k, _) in enumerate(demand):
+        demand_rows[k].setdefault(node, []).append(num_raw_materials + row)
+    raw_rows = [np.flatnonzero(A[:, k]) for k in range(num_products)]
+    capacity_start = num_raw_materials + len(demand)
+    num_rows = capacity_start + num_arcs
+    b_ub = np.concatenate((np.asarray(b, dtype=float),
+                           np.array([quantity for _, _, quantity in demand], dtype=float),
+                           np.asarray(d)[pricing.arc_i, pricing.arc_j].astype(float)))
+
+    # столбцы главной задачи: товар, дуги пути, стоимость, строки и коэффициенты
+    col_product, col_arcs, col_cost = [], [], []
+    col_rows, col_vals = [], []
+    known = set()
+
+    def add_column(k, arcs):
+        key = (k, tuple(arcs))
+        if key in known:
+            return False
+        known.add(key)
+        rows = raw_rows[k].tolist() + [capacity_start + e for e in arcs]
+        vals = A[raw_rows[k], k].tolist() + [1.0] * len(arcs)
+        for e in arcs:
+            for row in demand_rows[k].get(pricing.arc_j[e], ()):
+                rows.append(row)
+                vals.append(1.0)
+        col_product.append(k)
+        col_arcs.append(arcs)
+        col_cost.append(-p[k] + pricing.arc_cost[arcs].sum())
+        col_rows.append(rows)
+        col_vals.append(vals)
+        return True
+
+    def price(k, raw_dual, demand_dual, capacity_dual):
+        # приведенная стоимость пути: -p[k] - A[:, k] * u + сумма по дугам (c_e - v_e - w_{голова, k})
+        node_dual = np.zeros(num_nodes)
+        for node, rows in demand_rows[k].items():
+            node_dual[node] = demand_dual[rows].sum()
+        weights = pricing.arc_cost - capacity_dual - node_dual[pricing.arc_j]
+        dist, pred = pricing.shortest_paths(weights)
+        base = -p[k] - A[:, k] @ raw_dual
+        reduced = base + dist[pricing.sinks]
+        best = np.argsort(reduced)[:columns_per_product]
+        return [(k, pricing.path(pred, sink)) for sink in pricing.sinks[best[reduced[best] < -tolerance]]]
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers != 1 else None
+    run = pool.map if pool is not None else map
+
+    duals = (np.zeros(num_raw_materials), np.zeros(num_rows), np.zeros(num_arcs))
+    res = None
+    try:
+        for _ in range(max_iterations):
+            added = 0
+            for columns in run(lambda k: price(k, *duals), range(num_products)):
+                for k, arcs in columns:
+                    added += add_column(k, arcs)
+            if not added:
+                break
+
+            num_cols = len(col_cost)
+            lengths = [len(rows) for rows in col_rows]
+            matrix = coo_matrix((np.concatenate(col_vals),
+                                 (np.concatenate(col_rows).astype(int), np.repeat(np.arange(num_cols), lengths))),
+                                shape=(num_rows, num_cols)).tocsr()
+            res = linprog(c=np.array(col_cost), A_ub=matrix, b_ub=b_ub, bounds=(0, None), method='highs')
+            if not res.success:
+                break
+            marginals = res.ineqlin.marginals
+            duals = (marginals[:num_raw_materials], marginals, marginals[capacity_start:])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # потоки по путям -> вектор [x, y] в индексации build_sparse
+    solution = np.zeros(num_products + num_products * num_arcs)
+    if res is not None and res.success:
+        for k, arcs, flow in zip(col_product, col_arcs, res.x):
+            solution[k] += flow
+            solution[num_products + k * num_arcs + np.asarray(arcs, dtype=int)] += flow
+        return collect_results(res.message, -res.fun, solution, p, b, A, d, Q, nodes, consumers)
+    if res is not None:
+        print(f"Предупреждение: решение может быть неоптимальным. Статус: {res.message}")
+        return collect_results('suboptimal', 0, solution, p, b, A, d, Q, nodes, consumers)
+    # ни одного выгодного пути: ничего не производим
+    return collect_results('optimal', 0, solution, p, b, A, d, Q, nodes, consumers)
@@ -0,0 +1,91 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from assembly import arc_list
+
+
+class TransportView(Mapping):
+    """
+    Словарь {(товар, узел_i, узел_j): поток} поверх столбцов transport_table.
+
+    Ключи строятся только при обращении; индекс для поиска по ключу
+    создается при первом таком поиске.
+    """
+
+    def __init__(self, table, nodes):
+        self._table = table
+        self._nodes = nodes
+        self._index = None
+
+    def __len__(self):
+        return len(self._table['flow'])
+
+    def __iter__(self):
+        nodes = self._nodes
+        for k, i, j in zip(self._table['product'].tolist(), self._table['from'].tolist(),
+                           self._table['to'].tolist()):
+            yield k, nodes[i], nodes[j]
+
+    def __getitem__(self, key):
+        if self._index is None:
+            self._index = {key: row for row, key in enumerate(self)}
+        return self._table['flow'][self._index[key]]
+
+
+# Разбор вектора решения [x, y] в словарь результатов
+def collect_results(status, total_profit, solution, p, b, A, d, Q, nodes, consumers):
+    num_raw_materials = len(b)
+    num_products = len(p)
+    num_nodes = len(nodes)
+    num_x = num_products
+
+    x_sol = solution[:num_x]
+    y_sol = solution[num_x:]
+
+    # Собираем результаты
+    results = {
+        'status': status,
+        'total_profit': total_profit,
+        'production': {},
+        'transport': {},
+        'transport_table': {},
+        'raw_material_used': {},
+        'demand_satisfaction': {},
+        'raw_material_utilization': {}  # Добавляем информацию об использовании сырья
+    }
+
+    # Производство
+    for k in range(num_products):
+        results['production'][k] = max(0, x_sol[k])
+
+    # Использование сырья и уровень использования
+    for l in range(num_raw_materials):
+        used = sum(A[l][k] * results['production'][k] for k in range(num_products))
+        results['raw_material_used'][l] = min(used, b[l])
+        results['raw_material_utilization'][l] = min(used / b[l], 1.0) if b[l] > 0 else 0.0
+
+    # Транспортные потоки: столбцы (товар, индекс узла i, индекс узла j, поток)
+    arc_i, arc_j = arc_list(d)
+    num_arcs = len(arc_i)
+    y = np.maximum(np.asarray(y_sol, dtype=float)[:num_products * num_arcs], 0)
+    active = np.flatnonzero(y > 1e-6)
+    product, arc = np.divmod(active, num_arcs) if num_arcs else (active, active)
+    results['transport_table'] = {
+        'product': product,
+        'from': arc_i[arc],
+        'to': arc_j[arc],
+        'flow': y[active],
+    }
+    results['transport'] = TransportView(results['transport_table'], nodes)
+
+    # Удовлетворение спроса: суммарный приток по (товар, узел)
+    inflow = np.bincount(product * num_nodes + arc_j[arc], weights=y[active],
+                         minlength=num_products * num_nodes).reshape(num_products, num_nodes)
+    for consumer, demand_dict in Q.items():
+        results['demand_satisfaction'][consumer] = {}
+        consumer_node = consumers[consumer]
+        for k in demand_dict:
+            results['demand_satisfaction'][consumer][k] = inflow[k, consumer_node]
+
+    return results
@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from assembly import arc_list
+from warm_model import ProductionTransportModel, highspy
+
+
+# Анализ чувствительности по двойственным оценкам HiGHS. Модель минимизирует
+# -прибыль, поэтому оценки для прибыли берутся с обратным знаком.
+def analyze(model):
+    """
+    Решает модель и возвращает теневые цены ограничений, приведенные
+    стоимости и интервалы устойчивости для переменных производства.
+
+    Интервалы (цены p[k] и запасы b[l], в пределах которых базис остается
+    оптимальным) требуют highspy; без него вместо них возвращается None.
+    """
+    results = model.solve()
+    num_products = len(model.p)
+    num_raw = len(model.b)
+    row_dual = -model.row_dual
+    col_dual = -model.col_dual
+
+    arc_i, arc_j = arc_list(model.d)
+    capacity_start = num_raw + len(model.demand_rows)
+    shadow_prices = {
+        'raw_material': {l: row_dual[l] for l in range(num_raw)},
+        'demand': {},
+        'capacity': {(model.nodes[i], model.nodes[j]): row_dual[capacity_start + e]
+                     for e, (i, j) in enumerate(zip(arc_i, arc_j))},
+    }
+    for (consumer, k), row in model.demand_rows.items():
+        shadow_prices['demand'].setdefault(consumer, {})[k] = row_dual[row]
+
+    analysis = {
+        'total_profit': results['total_profit'],
+        'production': results['production'],
+        'shadow_prices': shadow_prices,
+        'reduced_costs': {k: col_dual[k] for k in range(num_products)},
+        'price_ranges': None,
+        'stock_ranges': None,
+    }
+
+    if model._highs is not None:
+        _, ranging = model._highs.getRanging()
+        # стоимость в модели -p[k]: интервал цены - отраженный интервал стоимости
+        analysis['price_ranges'] = {
+            k: (-ranging.col_cost_up.value_[k], -ranging.col_cost_dn.value_[k])
+            for k in range(num_products)
+        }
+        # для ненапряженного ограничения (базисная остаточная переменная)
+        # запас можно уменьшать до фактического расхода и увеличивать без границ
+        basis = model._highs.getBasis()
+        row_value = model._highs.getSolution().row_value
+        analysis['stock_ranges'] = {}
+        for l in range(num_raw):
+            if basis.row_status[l] == highspy.HighsBasisStatus.kBasic:
+                analysis['stock_ranges'][l] = (row_value[l], np.inf)
+            else:
+                analysis['stock_ranges'][l] = (ranging.row_bound_dn.value_[l], ranging.row_bound_up.value_[l])
+
+    return analysis
+
+
+def _allowed_ratio(delta, base, ranges):
+    # правило 100%: сумма долей использованных допустимых изменений
+    lower = np.array([ranges[i][0] for i in range(len(base))], dtype=float)
+    upper = np.array([ranges[i][1] for i in range(len(base))], dtype=float)
+    room = np.where(delta > 0, upper - base, base - lower)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(delta == 0, 0.0, np.abs(delta) / room)
+    return np.nan_to_num(ratio, nan=np.inf, posinf=np.inf).sum(axis=1)
+
+
+_worker_model = None
+
+
+def _init_worker(args):
+    global _worker_model
+    _worker_model = ProductionTransportModel(*args)
+
+
+def _resolve(task):
+    index, p, b = task
+    _worker_model.update_prices(p)
+    _worker_model.update_stocks(b)
+    return index, _worker_model.solve()['total_profit']
+
+
+def scenario_sweep(p, b, A, d, Q, c, nodes, source_node, consumers, prices=None, stocks=None, workers=None):
+    """
+    Прибыль для набора сценариев: prices - матрица (S, K) цен, stocks -
+    матрица (S, L) запасов сырья (None - базовые значения).
+
+    Сценарий, в котором меняются только цены или только запасы и изменения
+    укладываются в интервалы устойчивости (правило 100%), оценивается по
+    двойственным оценкам без решения. Остальные решаются заново в пуле
+    процессов; каждый процесс держит свою модель с горячим стартом.
+
+    Returns:
+        {'profit': прибыль по сценариям, 'resolved': какие сценарии решались заново}
+    """
+    if prices is None and stocks is None:
+        raise ValueError("нужно задать prices или stocks")
+    args = (p, b, A, d, Q, c, nodes, source_node, consumers)
+    base = analyze(ProductionTransportModel(*args))
+    p0 = np.asarray(p, dtype=float)
+    b0 = np.asarray(b, dtype=float)
+
+    num_scenarios = len(prices) if prices is not None else len(stocks)
+    P = np.tile(p0, (num_scenarios, 1)) if prices is None else np.asarray(prices, dtype=float)
+    B = np.tile(b0, (num_scenarios, 1)) if stocks is None else np.asarray(stocks, dtype=float)
+    dp = P - p0
+    db = B - b0
+
+    x = np.array([base['production'][k] for k in range(len(p0))])
+    y = np.array([base['shadow_prices']['raw_material'][l] for l in range(len(b0))])
+    profit = base['total_profit'] + dp @ x + db @ y
+
+    price_only = ~db.any(axis=1)
+    stock_only = ~dp.any(axis=1)
+    if base['price_ranges'] is not None:
+        valid = (price_only & (_allowed_ratio(dp, p0, base['price_ranges']) <= 1)) | \
+                (stock_only & (_allowed_ratio(db, b0, base['stock_ranges']) <= 1))
+    else:
+        valid = price_only & stock_only
+
+    resolve = np.flatnonzero(~valid)
+    if len(resolve):
+        tasks = [(s, P[s], B[s]) for s in resolve]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(args,)) as pool:
+            for s, value in pool.map(_resolve, tasks, chunksize=max(1, len(tasks) // 64)):
+                profit[s] = value
+
+    return {'profit': profit, 'resolved': ~valid}
@@ -0,0 +1,160 @@
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import vstack
+
+from assembly import build_sparse
+from results import collect_results
+
+try:
+    import highspy
+except ImportError:  # без highspy каждое решение - холодный запуск linprog
+    highspy = None
+
+
+class ProductionTransportModel:
+    """
+    Модель optimize_production_transport_linprog, собираемая один раз.
+
+    Между решениями меняются только цены p, запасы сырья b и спрос Q:
+    это коэффициенты целевой функции и правые части, матрица ограничений
+    остается прежней. При наличии highspy модель держится внутри одного
+    экземпляра HiGHS, и после изменений симплекс стартует с прошлого базиса.
+    """
+
+    def __init__(self, p, b, A, d, Q, c, nodes, source_node, consumers):
+        self.p = list(p)
+        self.b = list(b)
+        self.A = A
+        self.d = np.asarray(d)
+        self.c = np.asarray(c)
+        self.Q = {consumer: dict(demand) for consumer, demand in Q.items()}
+        self.nodes = nodes
+        self.source_node = source_node
+        self.consumers = consumers
+        self.iterations = 0
+        self.row_dual = None  # двойственные оценки последнего решения (для задачи минимизации)
+        self.col_dual = None
+        self._build()
+
+    def _build(self):
+        # строка спроса есть для каждой пары (потребитель, товар) из Q;
+        # нулевой спрос (в исходной модели строки нет) - бесконечная граница
+        structure = {consumer: {k: np.inf for k in demand} for consumer, demand in self.Q.items()}
+        c_obj, A_ub, b_ub, A_eq, b_eq = build_sparse(self.p, self.b, self.A, self.d, structure, self.c,
+                                                     len(self.nodes), self.source_node, self.consumers)
+        num_raw = len(self.b)
+        keys = [(consumer, k) for consumer, demand in self.Q.items() for k in demand]
+        self.demand_rows = {key: num_raw + i for i, key in enumerate(keys)}
+
+        self.c_obj = c_obj
+        self.num_ub = A_ub.shape[0]
+        if A_eq is not None:
+            self.matrix = vstack([A_ub, A_eq]).tocsc()
+            self.row_lower = np.concatenate((np.full(self.num_ub, -np.inf), b_eq))
+            self.row_upper = np.concatenate((b_ub, b_eq))
+        else:
+            self.matrix = A_ub.tocsc()
+            self.row_lower = np.full(self.num_ub, -np.inf)
+            self.row_upper = b_ub
+        for (consumer, k), row in self.demand_rows.items():
+            quantity = self.Q[consumer][k]
+            self.row_upper[row] = quantity if quantity > 0 else np.inf
+
+        self._highs = None
+        if highspy is not None:
+            self._highs = highspy.Highs()
+            self._highs.setOptionValue('output_flag', False)
+            lp = highspy.HighsLp()
+            lp.num_col_ = len(c_obj)
+            lp.num_row_ = self.matrix.shape[0]
+            lp.col_cost_ = c_obj
+            lp.col_lower_ = np.zeros(len(c_obj))
+            lp.col_upper_ = np.full(len(c_obj), highspy.kHighsInf)
+            lp.row_lower_ = np.where(np.isinf(self.row_lower), -highspy.kHighsInf, self.row_lower)
+            lp.row_upper_ = np.where(np.isinf(self.row_upper), highspy.kHighsInf, self.row_upper)
+            lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+            lp.a_matrix_.start_ = self.matrix.indptr
+            lp.a_matrix_.index_ = self.matrix.indices
+            lp.a_matrix_.value_ = self.matrix.data
+            self._highs.passModel(lp)
+
+    def _set_rows(self, rows):
+        rows = np.asarray(rows, dtype=np.int32)
+        if self._highs is not None and len(rows):
+            upper = self.row_upper[rows]
+            self._highs.changeRowsBounds(len(rows), rows,
+                                         np.where(np.isinf(self.row_lower[rows]), -highspy.kHighsInf,
+                                                  self.row_lower[rows]),
+                                         np.where(np.isinf(upper), highspy.kHighsInf, upper))
+
+    def update_prices(self, p):
+        """Новые цены реализации товаров."""
+        self.p = list(p)
+        num_products = len(self.p)
+        self.c_obj[:num_products] = -np.asarray(self.p, dtype=float)
+        if self._highs is not None:
+            self._highs.changeColsCost(num_products, np.arange(num_products, dtype=np.int32),
+                                       self.c_obj[:num_products])
+
+    def update_stocks(self, b):
+        """Новые запасы сырья."""
+        self.b = list(b)
+        self.row_upper[:len(self.b)] = self.b
+        self._set_rows(np.arange(len(self.b)))
+
+    def update_demand(self, Q):
+        """Новый спрос; появление новой пары (потребитель, товар) пересобирает модель."""
+        Q = {consumer: dict(demand) for consumer, demand in Q.items()}
+        if set((consumer, k) for consumer, demand in Q.items() for k in demand) != set(self.demand_rows):
+            self.Q = Q
+            self._build()
+            return
+        self.Q = Q
+        rows = []
+        for (consumer, k), row in self.demand_rows.items():
+            quantity = Q[consumer][k]
+            self.row_upper[row] = quantity if quantity > 0 else np.inf
+            rows.append(row)
+        self._set_rows(rows)
+
+    def solve(self):
+        """Решение с текущими данными; результат - как у optimize_production_transport_linprog."""
+        if self._highs is not None:
+            self._highs.run()
+            status = self._highs.getModelStatus()
+            success = status == highspy.HighsModelStatus.kOptimal
+            message = self._highs.modelStatusToString(status)
+            highs_solution = self._highs.getSolution()
+            solution = np.array(highs_solution.col_value) if success else None
+            objective = self._highs.getInfo().objective_function_value
+            self.iterations = self._highs.getInfo().simplex_iteration_count
+            if success:
+                self.row_dual = np.array(highs_solution.row_dual)
+                self.col_dual = np.array(highs_solution.col_dual)
+        else:
+            finite = np.isfinite(self.row_upper[:self.num_ub])
+            ub = np.flatnonzero(finite)
+            rows = self.matrix.tocsr()
+            A_eq = rows[self.num_ub:] if rows.shape[0] > self.num_ub else None
+            res = linprog(c=self.c_obj, A_ub=rows[ub], b_ub=self.row_upper[ub],
+                          A_eq=A_eq, b_eq=self.row_upper[self.num_ub:] if A_eq is not None else None,
+                          bounds=(0, None), method='highs')
+            success, message = res.success, res.message
+            solution = res.x if success else None
+            objective = res.fun
+            self.iterations = res.nit
+            if success:
+                self.row_dual = np.zeros(rows.shape[0])
+                self.row_dual[ub] = res.ineqlin.marginals
+                if A_eq is not None:
+                    self.row_dual[self.num_ub:] = res.eqlin.marginals
+                self.col_dual = res.lower.marginals
+
+        if not success:
+            print(f"Предупреждение: решение может быть неоптимальным. Статус: {message}")
+        return collect_results(
+            message if success else 'suboptimal',
+            -objective if success else 0,
+            solution if success else np.zeros(len(self.c_obj)),
+            self.p, self.b, self.A, self.d, self.Q, self.nodes, self.consumers
+        )
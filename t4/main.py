@@ -1,13 +1,37 @@
+import sys
+from pathlib import Path
 from pulp import *
 from time import time
 
+import numpy as np
 
-def main():
-    # Параметры задачи
-    K = 3  # количество типов товаров
-    L = 2  # количество типов сырья
-    N = 4  # количество пунктов в транспортном графе
-    M = 5  # количество дней
+from matrix_model import solve_matrix
+from rolling import rolling_horizon
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.solver_control import SolverControl, has_callback
+
+
+def generate_params(K, L, N, M, seed=None):
+    # Генерация случайных параметров
+    np.random.seed(int(time()) if seed is None else seed)
+
+    return {
+        'K': K, 'L': L, 'N': N, 'M': M,
+        'p': np.random.rand(K, M) * 100,  # цены реализации
+        'A': np.random.rand(L, K) * 0.5,  # нормозатраты сырья
+        'y': np.random.rand(L, M) * 100,  # поступление сырья
+        'd': np.random.rand(N, N) * 200,  # пропускные способности
+        'Q': np.random.rand(K) * 500,  # спрос на товары
+        'c': np.random.rand(N, N) * 50,  # стоимости перевозок
+    }
+
+
+def build_model(params):
+    K, L, N, M = params['K'], params['L'], params['N'], params['M']
+    p, A, y, d, Q, c = (params[key] for key in ('p', 'A', 'y', 'd', 'Q', 'c'))
 
     # Создаем модель
     model = LpProblem("Production_Transportation_Problem", LpMaximize)
@@ -18,18 +42,6 @@ def main():
     z = LpVariable.dicts("z", ((i, j) for i in range(1, N + 1) for j in range(1, N + 1)), lowBound=0, cat='Continuous')
     b = LpVariable.dicts("b", ((l, m) for l in range(1, L + 1) for m in range(1, M + 1)), lowBound=0, cat='Continuous')
 
-    # Генерация случайных параметров
-    import numpy as np
-
-    np.random.seed(time())
-
-    p = np.random.rand(K, M) * 100  # цены реализации
-    A = np.random.rand(L, K) * 0.5  # нормозатраты сырья
-    y = np.random.rand(L, M) * 100  # поступление сырья
-    d = np.random.rand(N, N) * 200  # пропускные способности
-    Q = np.random.rand(K) * 500  # спрос на товары
-    c = np.random.rand(N, N) * 50  # стоимости перевозок
-
     # Целевая функция: максимизация прибыли
     model += lpSum(p[k - 1][m - 1] * x[(k, m)] for k in range(1, K + 1) for m in range(1, M + 1)) - \
              lpSum(c[i - 1][j - 1] * u[(i, j)] for i in range(1, N + 1) for j in range(1, N + 1))
@@ -69,35 +81,88 @@ def main():
     # Все товары должны прибыть в пункт N
     model += lpSum(z[(i, N)] for i in range(1, N)) >= total_production
 
-    # Решаем
-    model.solve()
+    return model, x, u, z, b
+
+
+@cached('t4.solve_pulp', bypass=has_callback)
+def solve_pulp(params, control=None):
+    with profiling.span('build'):
+        model, x, u, z, b = build_model(params)
+        profiling.count('variables', model.numVariables())
+        profiling.count('constraints', model.numConstraints())
+        if profiling.enabled():
+            profiling.count('nonzeros', sum(len(constraint) for constraint in model.constraints.values()))
+
+    # Решаем (control - ограничения времени, разрыва и потоков, см. utils/solver_control.py)
+    with profiling.span('solve'):
+        control = control or SolverControl(msg=True)
+        control.solve(model)
+        profiling.count('bb_nodes', control.nodes or 0)
+
+    with profiling.span('extract'):
+        values = {
+            'x': {key: var.varValue for key, var in x.items()},
+            'u': {key: var.varValue for key, var in u.items()},
+            'z': {key: var.varValue for key, var in z.items()},
+            'b': {key: var.varValue for key, var in b.items()},
+        }
+    return LpStatus[model.status], value(model.objective), values
+
+
+def show(status, objective, values, params):
+    K, L, N, M = params['K'], params['L'], params['N'], params['M']
+    x, u, z, b = values['x'], values['u'], values['z'], values['b']
 
     # Выводим результаты
-    print("Status:", LpStatus[model.status])
-    print("Optimal Profit:", value(model.objective))
+    print("Status:", status)
+    print("Optimal Profit:", objective)
 
     # Выводим оптимальные значения переменных
     print("\nProduction:")
     for k in range(1, K + 1):
         for m in range(1, M + 1):
-            print(f"x[{k}][{m}] = {x[(k, m)].varValue}")
+            print(f"x[{k}][{m}] = {x[(k, m)]}")
 
     print("\nTransportation (binary):")
     for i in range(1, N + 1):
         for j in range(1, N + 1):
-            if u[(i, j)].varValue > 0:
-                print(f"u[{i}][{j}] = {u[(i, j)].varValue}")
+            if u[(i, j)] > 0:
+                print(f"u[{i}][{j}] = {u[(i, j)]}")
 
     print("\nTransportation (volume):")
     for i in range(1, N + 1):
         for j in range(1, N + 1):
-            if z[(i, j)].varValue > 0:
-                print(f"z[{i}][{j}] = {z[(i, j)].varValue}")
+            if z[(i, j)] > 0:
+                print(f"z[{i}][{j}] = {z[(i, j)]}")
 
     print("\nRaw Material Inventory:")
     for l in range(1, L + 1):
         for m in range(1, M + 1):
-            print(f"b[{l}][{m}] = {b[(l, m)].varValue}")
+            print(f"b[{l}][{m}] = {b[(l, m)]}")
+
+
+def main(method='matrix', window=None, step=None, control=None):
+    # Параметры задачи
+    K = 3  # количество типов товаров
+    L = 2  # количество типов сырья
+    N = 4  # количество пунктов в транспортном графе
+    M = 5  # количество дней
+
+    params = generate_params(K, L, N, M)
+
+    # 'pulp' - модель через выражения PuLP и CBC,
+    # 'matrix' - та же модель разреженными матрицами через scipy.optimize.milp (HiGHS),
+    # 'rolling' - скользящий горизонт из window дней с шагом step (rolling.py)
+    control = control or SolverControl(msg=method == 'pulp')
+    with profiling.span('t4.main'):
+        if method == 'rolling':
+            result = rolling_horizon(params, window or M, step, control.milp_options())
+        elif method == 'pulp':
+            result = solve_pulp(params, control)
+        else:
+            result = solve_matrix(params, control.milp_options())
+        with profiling.span('render'):
+            show(*result, params)
 
 
 if __name__ == '__main__':
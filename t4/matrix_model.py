@@ -0,0 +1,151 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+
+
+# Та же модель, что и build_model в main.py, собранная сразу матрицами.
+#
+# Порядок переменных (индексы с нуля):
+#   x[k, m] -> k * M + m
+#   u[i, j] -> K*M + i * N + j
+#   z[i, j] -> K*M + N*N + i * N + j
+#   b[l, m] -> K*M + 2*N*N + l * M + m
+#
+# Строки z >= 0, z <= d и b >= 0 из PuLP-модели заданы границами
+# переменных, а не ограничениями.
+
+STATUS = {0: 'Optimal', 1: 'Not Solved', 2: 'Infeasible', 3: 'Unbounded', 4: 'Undefined'}
+
+
+def offsets(K, L, N, M):
+    x0 = 0
+    u0 = x0 + K * M
+    z0 = u0 + N * N
+    b0 = z0 + N * N
+    return x0, u0, z0, b0, b0 + L * M
+
+
+def build_matrix(params, state=None):
+    """
+    state - состояние на начало периода (для скользящего горизонта):
+    'stock' - запас сырья [l], 'committed' - уже зафиксированное производство,
+    которое тоже нужно вывезти, 'opened' - уже открытые дуги [i][j].
+
+    Returns:
+        (c, constraints, integrality, bounds) - аргументы scipy.optimize.milp
+        (целевая функция на минимум, т.е. со знаком минус).
+    """
+    K, L, N, M = params['K'], params['L'], params['N'], params['M']
+    p, A, y, d, Q, c = (np.asarray(params[key], dtype=float) for key in ('p', 'A', 'y', 'd', 'Q', 'c'))
+    x0, u0, z0, b0, total = offsets(K, L, N, M)
+    state = state or {}
+    stock = np.asarray(state.get('stock', np.zeros(L)), dtype=float)
+    committed = state.get('committed', 0)
+
+    x_idx = x0 + np.arange(K * M).reshape(K, M)
+    u_idx = u0 + np.arange(N * N).reshape(N, N)
+    z_idx = z0 + np.arange(N * N).reshape(N, N)
+    b_idx = b0 + np.arange(L * M).reshape(L, M)
+
+    # Целевая функция: максимизация p*x - c*u
+    objective = np.zeros(total)
+    objective[x_idx.ravel()] = -p.ravel()
+    objective[u_idx.ravel()] = c.ravel()
+
+    rows, cols, vals, lower, upper = [], [], [], [], []
+    row = 0
+
+    # 1. Баланс сырья: b[l, m] - b[l, m-1] + sum_k A[l, k] x[k, m] = y[l, m]
+    balance = row + np.arange(L * M).reshape(L, M)
+    rows += [balance.ravel(), balance[:, 1:].ravel()]
+    cols += [b_idx.ravel(), b_idx[:, :-1].ravel()]
+    vals += [np.ones(L * M), -np.ones(L * (M - 1))]
+    l, k, m = (a.ravel() for a in np.meshgrid(np.arange(L), np.arange(K), np.arange(M), indexing='ij'))
+    rows.append(balance[l, m])
+    cols.append(x_idx[k, m])
+    vals.append(A[l, k])
+    rhs = y.copy()
+    rhs[:, 0] += stock
+    lower.append(rhs.ravel())
+    upper.append(rhs.ravel())
+    row += L * M
+
+    # 2. Производство не превышает спрос: sum_m x[k, m] <= Q[k]
+    rows.append(row + np.repeat(np.arange(K), M))
+    cols.append(x_idx.ravel())
+    vals.append(np.ones(K * M))
+    lower.append(np.full(K, -np.inf))
+    upper.append(Q)
+    row += K
+
+    # 3. Перевозка только по открытым дугам: z[i, j] - d[i, j] u[i, j] <= 0
+    arcs = row + np.arange(N * N)
+    rows += [arcs, arcs]
+    cols += [z_idx.ravel(), u_idx.ravel()]
+    vals += [np.ones(N * N), -d.ravel()]
+    lower.append(np.full(N * N, -np.inf))
+    upper.append(np.zeros(N * N))
+    row += N * N
+
+    # 4. Вывоз из пункта 1 и привоз в пункт N не меньше общего производства
+    rows += [np.full(N - 1, row), np.full(N - 1, row + 1), np.full(K * M, row), np.full(K * M, row + 1)]
+    cols += [z_idx[0, 1:], z_idx[:-1, N - 1], x_idx.ravel(), x_idx.ravel()]
+    vals += [np.ones(N - 1), np.ones(N - 1), -np.ones(K * M), -np.ones(K * M)]
+    lower.append(np.full(2, committed, dtype=float))
+    upper.append(np.full(2, np.inf))
+    row += 2
+
+    matrix = coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                        shape=(row, total)).tocsr()
+    constraints = LinearConstraint(matrix, np.concatenate(lower), np.concatenate(upper))
+
+    integrality = np.zeros(total)
+    integrality[u_idx.ravel()] = 1
+    var_upper = np.full(total, np.inf)
+    var_upper[u_idx.ravel()] = 1
+    var_upper[z_idx.ravel()] = d.ravel()
+    var_lower = np.zeros(total)
+    if 'opened' in state:
+        var_lower[u_idx.ravel()] = np.asarray(state['opened'], dtype=float).ravel()
+    bounds = Bounds(var_lower, var_upper)
+
+    return objective, constraints, integrality, bounds
+
+
+def unpack(solution, params):
+    # вектор решения -> словари с теми же ключами, что и переменные PuLP-модели
+    K, L, N, M = params['K'], params['L'], params['N'], params['M']
+    x0, u0, z0, b0, _ = offsets(K, L, N, M)
+    u = np.round(solution[u0:z0])
+    return {
+        'x': {(k + 1, m + 1): solution[x0 + k * M + m] for k in range(K) for m in range(M)},
+        'u': {(i + 1, j + 1): u[i * N + j] for i in range(N) for j in range(N)},
+        'z': {(i + 1, j + 1): solution[z0 + i * N + j] for i in range(N) for j in range(N)},
+        'b': {(l + 1, m + 1): solution[b0 + l * M + m] for l in range(L) for m in range(M)},
+    }
+
+
+@cached('t4.solve_matrix')
+def solve_matrix(params, options=None, state=None):
+    """Решение через scipy.optimize.milp; результат - как у solve_pulp в main.py."""
+    with profiling.span('build'):
+        objective, constraints, integrality, bounds = build_matrix(params, state)
+        profiling.count('variables', len(objective))
+        profiling.count('constraints', constraints.A.shape[0])
+        profiling.count('nonzeros', constraints.A.nnz)
+    with profiling.span('solve'):
+        res = milp(objective, constraints=constraints, integrality=integrality, bounds=bounds,
+                   options=options or {})
+        profiling.count('bb_nodes', getattr(res, 'mip_node_count', 0) or 0)
+    with profiling.span('extract'):
+        if res.x is None:
+            K, L, N, M = params['K'], params['L'], params['N'], params['M']
+            return STATUS.get(res.status, 'Undefined'), None, unpack(np.zeros(offsets(K, L, N, M)[-1]), params)
+        return STATUS.get(res.status, 'Undefined'), -res.fun, unpack(res.x, params)
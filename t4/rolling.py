@@ -0,0 +1,62 @@
+import numpy as np
+
+from matrix_model import solve_matrix
+
+
+# Скользящий горизонт: решаем окно из window дней, фиксируем решения первых
+# step дней и сдвигаем окно. Между окнами переносятся запас сырья на конец
+# зафиксированных дней, остаток спроса Q, уже зафиксированное производство
+# (его тоже нужно вывезти) и открытые дуги u (их стоимость уже учтена).
+
+def rolling_horizon(params, window, step=None, options=None):
+    """
+    Returns:
+        (status, objective, values) - как у solve_matrix для всего периода.
+    """
+    K, L, N, M = params['K'], params['L'], params['N'], params['M']
+    step = step or window
+    assert 0 < step <= window
+    p, y, Q, c = (np.asarray(params[key], dtype=float) for key in ('p', 'y', 'Q', 'c'))
+
+    x = np.zeros((K, M))
+    b = np.zeros((L, M))
+    state = {'stock': np.zeros(L), 'committed': 0.0, 'opened': np.zeros((N, N))}
+    status, z = 'Optimal', np.zeros((N, N))
+
+    for start in range(0, M, step):
+        days = min(window, M - start)
+        fixed = days if start + window >= M else step
+        part = dict(params, M=days, p=p[:, start:start + days], y=y[:, start:start + days],
+                    Q=np.maximum(Q - x.sum(axis=1), 0))
+        status, _, values = solve_matrix(part, options, state)
+        if status != 'Optimal':
+            break
+
+        for (k, m), amount in values['x'].items():
+            if m <= fixed:
+                x[k - 1, start + m - 1] = amount
+        for (l, m), amount in values['b'].items():
+            if m <= fixed:
+                b[l - 1, start + m - 1] = amount
+        u = np.array([[values['u'][(i, j)] for j in range(1, N + 1)] for i in range(1, N + 1)])
+        z = np.array([[values['z'][(i, j)] for j in range(1, N + 1)] for i in range(1, N + 1)])
+
+        state = {'stock': b[:, start + fixed - 1], 'committed': x.sum(), 'opened': u}
+        if start + window >= M:
+            break
+
+    values = {
+        'x': {(k + 1, m + 1): x[k, m] for k in range(K) for m in range(M)},
+        'u': {(i + 1, j + 1): state['opened'][i, j] for i in range(N) for j in range(N)},
+        'z': {(i + 1, j + 1): z[i, j] for i in range(N) for j in range(N)},
+        'b': {(l + 1, m + 1): b[l, m] for l in range(L) for m in range(M)},
+    }
+    objective = (p * x).sum() - (c * state['opened']).sum()
+    return status, objective, values
+
+
+def gap(params, window, step=None, options=None):
+    """Относительный разрыв скользящего горизонта с полной моделью (для небольших задач)."""
+    _, full, _ = solve_matrix(params, options)
+    _, rolling, _ = rolling_horizon(params, window, step, options)
+    return (full - rolling) / max(abs(full), 1e-9), full, rolling
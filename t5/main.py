@@ -1,7 +1,15 @@
+import sys
+from pathlib import Path
+
 import networkx as nx
-from pyvis.network import Network
 import pulp
-from itertools import combinations
+
+from mst import kruskal, prim
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling, render
+from utils.cache import cached
+from utils.cutting_plane import CuttingPlane
 
 
 def create_weighted_graph():
@@ -21,70 +29,118 @@ def create_weighted_graph():
     return G
 
 
-def find_mst_with_lp(graph):
-    edges = list(graph.edges(data=True))
-    nodes = list(graph.nodes())
-    n = len(nodes)
+@cached('t5.find_mst_with_lp', ignore=('report',), bypass=lambda arguments: arguments['report'])
+def find_mst_with_lp(graph, report=False):
+    with profiling.span('t5.find_mst_with_lp'):
+        with profiling.span('build'):
+            edges = list(graph.edges(data=True))
+            nodes = list(graph.nodes())
+            n = len(nodes)
 
-    # Создаем задачу
-    prob = pulp.LpProblem("Minimum_Spanning_Tree", pulp.LpMinimize)
+            # Создаем задачу
+            prob = pulp.LpProblem("Minimum_Spanning_Tree", pulp.LpMinimize)
 
-    # Бинарные переменные для каждого ребра
-    edge_vars = {
-        (u, v): pulp.LpVariable(f"x_{u}_{v}", cat=pulp.LpBinary)
-        for u, v, data in edges
-    }
+            # Бинарные переменные для каждого ребра
+            edge_vars = {
+                (u, v): pulp.LpVariable(f"x_{u}_{v}", cat=pulp.LpBinary)
+                for u, v, data in edges
+            }
 
-    # Целевая функция: минимизировать суммарный вес
-    prob += pulp.lpSum(
-        edge_vars[(u, v)] * data['weight']
-        for u, v, data in edges
-    )
-
-    # Ограничение: ровно (n-1) ребро
-    prob += pulp.lpSum(edge_vars.values()) == n - 1
-
-    # Условия на разрезы для всех подмножеств (исключаем циклы)
-    for size in range(2, n):
-        for subset in combinations(nodes, size):
-            # Сумма рёбер внутри подмножества <= |subset| - 1
+            # Целевая функция: минимизировать суммарный вес
             prob += pulp.lpSum(
-                edge_vars[(u, v)] for u, v in edge_vars
-                if u in subset and v in subset
-            ) <= len(subset) - 1
-
-    # Решаем задачу
-    prob.solve(pulp.PULP_CBC_CMD(msg=False))
-
-    # Собираем
-    mst = nx.Graph()
-    for u, v, data in edges:
-        if pulp.value(edge_vars[(u, v)]) > 0.5:
-            mst.add_edge(u, v, weight=data['weight'])
-
-    return mst
-
-
-def visualize_graphs(original_graph, mst_graph):
+                edge_vars[(u, v)] * data['weight']
+                for u, v, data in edges
+            )
+
+            # Ограничение: ровно (n-1) ребро
+            prob += pulp.lpSum(edge_vars.values()) == n - 1
+            profiling.count('variables', len(edge_vars))
+
+        # Условия связности (разрезы) добавляются лениво: после каждого решения
+        # ищем минимальный разрез по значениям переменных и добавляем нарушенные
+        def separate(_):
+            return connectivity_cuts(nodes, edge_vars)
+
+        with profiling.span('solve'):
+            driver = CuttingPlane(prob, separate)
+            driver.solve()
+            profiling.count('rounds', len(driver.history))
+            profiling.count('constraints', len(prob.constraints))
+            if profiling.enabled():
+                profiling.count('nonzeros', sum(len(constraint) for constraint in prob.constraints.values()))
+        if report:
+            driver.report()
+
+        # Собираем
+        with profiling.span('extract'):
+            mst = nx.Graph()
+            for u, v, data in edges:
+                if pulp.value(edge_vars[(u, v)]) > 0.5:
+                    mst.add_edge(u, v, weight=data['weight'])
+
+        return mst
+
+
+def connectivity_cuts(nodes, edge_vars, tolerance=1e-6):
+    # Разделение через max-flow/min-cut: граф с пропускными способностями x_e;
+    # разрез S с x(δ(S)) < 1 нарушает условие связности x(δ(S)) >= 1
+    support = nx.Graph()
+    support.add_nodes_from(nodes)
+    for (u, v), var in edge_vars.items():
+        value = pulp.value(var) or 0
+        if value > tolerance:
+            support.add_edge(u, v, capacity=value)
+
+    def cut(side):
+        return pulp.lpSum(
+            var for (u, v), var in edge_vars.items()
+            if (u in side) != (v in side)
+        ) >= 1
+
+    # несвязный носитель: x(δ(C)) = 0 для каждой компоненты C, режем их все сразу
+    components = list(nx.connected_components(support))
+    if len(components) > 1:
+        return [cut(component) for component in components]
+
+    # связная дробная точка: минимальные разрезы от корня до каждой вершины,
+    # разные стороны разрезов сохраняются все
+    root = nodes[0]
+    cuts = []
+    seen = set()
+    for node in nodes[1:]:
+        cut_value, (side, _) = nx.minimum_cut(support, root, node)
+        side = frozenset(side)
+        if cut_value < 1 - tolerance and side not in seen:
+            seen.add(side)
+            cuts.append(cut(side))
+    return cuts
+
+
+def find_mst(graph, method='kruskal'):
+    # точные алгоритмы за O(E log V) или ЛП с ленивыми ограничениями
+    if method == 'kruskal':
+        return kruskal(graph)
+    if method == 'prim':
+        return prim(graph)
+    if method == 'lp':
+        return find_mst_with_lp(graph)
+    raise ValueError(f"неизвестный метод: {method}")
+
+
+# отрисовка, см. utils/render.py; у ребер дерева вес 1, так что nonzero=True оставляет только дерево
+def visualize_graphs(original_graph, mst_graph, **limits):
     # Исходный граф
-    net_original = Network(height="900px", width="100%")
-    for node in original_graph.nodes():
-        net_original.add_node(node)
-    for u, v, data in original_graph.edges(data=True):
-        net_original.add_edge(u, v, label=f"{data['weight']}")
+    edges = [(u, v, data['weight'], {'label': f"{data['weight']}"}) for u, v, data in original_graph.edges(data=True)]
+    render.pyvis("original_graph.html", original_graph.nodes(), edges, **limits)
 
     # Минимальное остовное дерево
-    net_mst = Network(height="900px", width="100%")
-    for node in original_graph.nodes():
-        net_mst.add_node(node)
-    for u, v, data in original_graph.edges(data=True):
-        net_mst.add_edge(u, v, label=f"{data['weight']}", color='red' if (u, v, data) in mst_graph.edges(data=True) else 'blue')
-
-    net_original.show("original_graph.html", notebook=False)
-    net_mst.show("mst_lp.html", notebook=False)
+    edges = [(u, v, int(mst_graph.has_edge(u, v)),
+              {'label': f"{data['weight']}", 'color': 'red' if mst_graph.has_edge(u, v) else 'blue'})
+             for u, v, data in original_graph.edges(data=True)]
+    render.pyvis("mst_lp.html", original_graph.nodes(), edges, **limits)
 
 
-def main():
+def main(draw=True, **limits):
     # Создаем граф
     G = create_weighted_graph()
 
@@ -94,7 +150,9 @@ def main():
     # Выводим
     print("Суммарный вес:", sum(data['weight'] for _, _, data in mst.edges(data=True)))
 
-    visualize_graphs(G, mst)
+    if draw:
+        with profiling.span('render'):
+            visualize_graphs(G, mst, **limits)
 
 
 if __name__ == "__main__":
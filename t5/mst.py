@@ -0,0 +1,69 @@
+import heapq
+
+import networkx as nx
+
+
+class UnionFind:
+    # система непересекающихся множеств со сжатием путей и объединением по рангу
+    def __init__(self, items):
+        self.parent = {x: x for x in items}
+        self.rank = {x: 0 for x in items}
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.rank[a] < self.rank[b]:
+            a, b = b, a
+        self.parent[b] = a
+        if self.rank[a] == self.rank[b]:
+            self.rank[a] += 1
+        return True
+
+
+def kruskal(graph):
+    # алгоритм Крускала: O(E log V)
+    mst = nx.Graph()
+    mst.add_nodes_from(graph.nodes())
+    components = UnionFind(graph.nodes())
+    remaining = graph.number_of_nodes() - 1
+    for u, v, data in sorted(graph.edges(data=True), key=lambda edge: edge[2]['weight']):
+        if components.union(u, v):
+            mst.add_edge(u, v, weight=data['weight'])
+            remaining -= 1
+            if remaining == 0:
+                break
+    return mst
+
+
+def prim(graph):
+    # алгоритм Прима с двоичной кучей: O(E log V); для несвязного графа - остовный лес
+    mst = nx.Graph()
+    mst.add_nodes_from(graph.nodes())
+    visited = set()
+    for root in graph.nodes():
+        if root in visited:
+            continue
+        visited.add(root)
+        heap = [(data['weight'], i, root, v) for i, (v, data) in enumerate(graph[root].items())]
+        heapq.heapify(heap)
+        counter = len(heap)
+        while heap:
+            weight, _, u, v = heapq.heappop(heap)
+            if v in visited:
+                continue
+            visited.add(v)
+            mst.add_edge(u, v, weight=weight)
+            for w, data in graph[v].items():
+                if w not in visited:
+                    heapq.heappush(heap, (data['weight'], counter, v, w))
+                    counter += 1
+    return mst
@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from engine import solve as solve_native
+
+
+def _timed(solver, name, data):
+    start = perf_counter()
+    result = solver(data)
+    return name, result, perf_counter() - start
+
+
+# пакетное решение: головоломки распределяются по пулу процессов,
+# результаты отдаются по мере готовности (name, [arr, solutions, pos_arr], latency)
+def solve_batch(puzzles, solver=solve_native, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_timed, solver, name, data) for name, data in puzzles.items()]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def percentile(values, q):
+    # процентиль по ближайшему рангу
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summary(latencies, elapsed):
+    return {
+        'puzzles': len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies),
+    }
+
+
+def show_summary(stats):
+    print(f"\n{stats['puzzles']} puzzles in {stats['elapsed']:.3f} s "
+          f"({stats['throughput']:.1f} puzzles/s)")
+    print(f"latency p50 {stats['p50'] * 1000:.1f} ms, p90 {stats['p90'] * 1000:.1f} ms, "
+          f"p99 {stats['p99'] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms")
@@ -0,0 +1,176 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.cache import cached
+
+ALL = 0x1FF  # битовая маска цифр 1..9: бит (k - 1) - цифра k
+BIT = {1 << (k - 1): k for k in range(1, 10)}
+
+
+# разметка набора пересекающихся сеток на общей доске
+def build_layout(data):
+    cells = {}  # (строка, столбец) на общей доске -> номер клетки
+    grid_cells = []  # для каждой сетки - номера клеток 9x9
+    for grid in data:
+        p = grid['pos']
+        ids = []
+        for i in range(9):
+            row = []
+            for j in range(9):
+                row.append(cells.setdefault((p[0] + i, p[1] + j), len(cells)))
+            ids.append(row)
+        grid_cells.append(ids)
+
+    # строки, столбцы и квадраты 3х3 всех сеток; совпадающие блоки
+    # пересекающихся сеток (угловые квадраты самурая) храним один раз
+    units = []
+    seen = set()
+    for ids in grid_cells:
+        groups = [ids[i] for i in range(9)]
+        groups += [[ids[i][j] for i in range(9)] for j in range(9)]
+        groups += [[ids[i][j] for i in range(r * 3, (r + 1) * 3) for j in range(c * 3, (c + 1) * 3)]
+                   for r in range(3) for c in range(3)]
+        for group in groups:
+            key = frozenset(group)
+            if key not in seen:
+                seen.add(key)
+                units.append(tuple(group))
+
+    cell_units = [[] for _ in range(len(cells))]
+    for u, group in enumerate(units):
+        for cell in group:
+            cell_units[cell].append(u)
+
+    return cells, grid_cells, units, cell_units
+
+
+class Board:
+    # состояние поиска: значения клеток и занятые цифры каждого блока
+    def __init__(self, layout):
+        self.cells, self.grid_cells, self.units, self.cell_units = layout
+        self.values = [0] * len(self.cells)
+        self.used = [0] * len(self.units)
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.cells, board.grid_cells, board.units, board.cell_units = \
+            self.cells, self.grid_cells, self.units, self.cell_units
+        board.values = self.values[:]
+        board.used = self.used[:]
+        return board
+
+    def place(self, cell, k):
+        if self.values[cell]:
+            return self.values[cell] == k
+        bit = 1 << (k - 1)
+        used = self.used
+        for u in self.cell_units[cell]:
+            if used[u] & bit:
+                return False
+        for u in self.cell_units[cell]:
+            used[u] |= bit
+        self.values[cell] = k
+        return True
+
+    def candidates(self, cell):
+        mask = 0
+        used = self.used
+        for u in self.cell_units[cell]:
+            mask |= used[u]
+        return ALL & ~mask
+
+    def propagate(self):
+        # одиночки (единственная цифра в клетке) и скрытые одиночки
+        # (единственное место для цифры в блоке) до неподвижной точки
+        values, used = self.values, self.used
+        changed = True
+        while changed:
+            changed = False
+            candidates = {}
+            for cell, value in enumerate(values):
+                if not value:
+                    mask = self.candidates(cell)
+                    if not mask:
+                        return False
+                    if mask & (mask - 1) == 0:
+                        if not self.place(cell, BIT[mask]):
+                            return False
+                        changed = True
+                    else:
+                        candidates[cell] = mask
+            if changed:
+                continue
+
+            for u, group in enumerate(self.units):
+                once = twice = 0
+                for cell in group:
+                    mask = candidates.get(cell, 0)
+                    twice |= once & mask
+                    once |= mask
+                if (once | used[u]) != ALL:
+                    return False
+                hidden = once & ~twice & ~used[u]
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for cell in group:
+                        if candidates.get(cell, 0) & bit:
+                            if not self.place(cell, BIT[bit]):
+                                return False
+                            changed = True
+                            break
+        return True
+
+
+def _search(board):
+    if not board.propagate():
+        return None
+    # ветвление по клетке с наименьшим числом кандидатов
+    best, best_mask, best_count = -1, 0, 10
+    for cell, value in enumerate(board.values):
+        if not value:
+            mask = board.candidates(cell)
+            count = bin(mask).count('1')
+            if count < best_count:
+                best, best_mask, best_count = cell, mask, count
+                if count == 2:
+                    break
+    if best < 0:
+        return board
+
+    while best_mask:
+        bit = best_mask & -best_mask
+        best_mask ^= bit
+        child = board.copy()
+        if child.place(best, BIT[bit]):
+            result = _search(child)
+            if result is not None:
+                return result
+    return None
+
+
+# решение без ЛП: тот же формат результата, что и у solve() в main.py
+@cached('t6.solve_native')
+def solve(data):
+    pos_arr = [grid['pos'] for grid in data]
+    arr = [grid['arr'] for grid in data]
+
+    layout = build_layout(data)
+    board = Board(layout)
+    consistent = True
+    for num, grid in enumerate(data):
+        for i in range(9):
+            for j in range(9):
+                k = grid['arr'][i][j]
+                if k != 0 and not board.place(layout[1][num][i][j], k):
+                    consistent = False
+
+    result = _search(board) if consistent else None
+    if result is None:
+        print("ERROR")
+        return [arr, [], pos_arr]
+
+    solutions = [[[result.values[ids[i][j]] for j in range(9)] for i in range(9)]
+                 for ids in layout[1]]
+    return [arr, solutions, pos_arr]
@@ -1,5 +1,17 @@
+import sys
+from pathlib import Path
+from time import perf_counter
+
 from pulp import *
 
+from batch import show_summary, solve_batch, summary
+from engine import build_layout, solve as solve_native
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.solver_control import SolverControl, has_callback
+
 
 # отображение судоку
 def show(arr, pos_arr):
@@ -30,84 +42,66 @@ def show(arr, pos_arr):
 
 
 # решение
-def solve(data):
-    # главная проблема
-    prob = LpProblem("sudoku")
-
-    # переменные
-    pos_arr = []
-    arr = []
-    connections = []
-    choices = [LpVariable.dicts(f"Choice_{i}", (range(9), range(9), range(1, 10)), cat=LpBinary) for i in range(len(data))]
-
-    # для каждой сетки судоку
-    for num in range(len(data)):
-
-        # одна цифра на клетку
-        for i in range(9):
-            for j in range(9):
-                prob += lpSum([choices[num][i][j][k] for k in range(1, 10)]) == 1
-
-        # уникальные цифры в строке
-        for i in range(9):
-            for k in range(1, 10):
-                prob += lpSum([choices[num][i][j][k] for j in range(9)]) == 1
-
-        # уникальные цифры в столбце
-        for j in range(9):
-            for k in range(1, 10):
-                prob += lpSum([choices[num][i][j][k] for i in range(9)]) == 1
-
-        # уникальные цифры в квадрате 3х3
-        for r in range(3):
-            for c in range(3):
-                for k in range(1, 10):
-                    prob += lpSum([choices[num][i][j][k]
-                                   for i in range(r*3, (r+1)*3)
-                                   for j in range(c*3, (c+1)*3)]) == 1
-
-        # ввод изначальных значений
-        for i in range(9):
-            for j in range(9):
-                if data[num]['arr'][i][j] != 0:
-                    k = data[num]['arr'][i][j]
-                    prob += choices[num][i][j][k] == 1
-
-        # оброаботка пересечений
-        p = data[num]['pos']
-        for n in range(len(pos_arr)):
-            pos = pos_arr[n]
-            for i in range(max(p[0], pos[0]), min(p[0]+9, pos[0]+9)):
-                for j in range(max(p[1], pos[1]), min(p[1]+9, pos[1]+9)):
-                    connections.append((n, i-pos[0], j-pos[1], num, i-p[0], j-p[1]))
-
-        pos_arr.append(p)
-        arr.append(data[num]['arr'])
-
-    # условие равенства пересекающихся клеток
-    for g1, i1, j1, g2, i2, j2 in connections:
-        for k in range(1, 10):
-            prob += choices[g1][i1][j1][k] == choices[g2][i2][j2][k]
-
-    # решатель
-    prob.solve()
-
-    # проверка наличия решения
-    if LpStatus[prob.status] != "Optimal":
-        print("ERROR")
-        return [arr, [], pos_arr]
-
-    # преобразование решения для отображения
-    solutions = [[[0 for _ in range(9)] for _ in range(9)] for _ in range(len(data))]
-    for n in range(len(data)):
-        for i in range(9):
-            for j in range(9):
+@cached('t6.solve', bypass=has_callback)
+def solve(data, control=None):
+    with profiling.span('t6.solve'):
+        with profiling.span('build'):
+            # главная проблема
+            prob = LpProblem("sudoku")
+
+            # общая доска: клетка, входящая в несколько сеток, - одна клетка с одним
+            # набором переменных (разметка та же, что и у решателя в engine.py)
+            pos_arr = [grid['pos'] for grid in data]
+            arr = [grid['arr'] for grid in data]
+            cells, grid_cells, units, _ = build_layout(data)
+
+            # переменные
+            choices = LpVariable.dicts("Choice", (range(len(cells)), range(1, 10)), cat=LpBinary)
+
+            # одна цифра на клетку
+            for cell in range(len(cells)):
+                prob += lpSum([choices[cell][k] for k in range(1, 10)]) == 1
+
+            # уникальные цифры в строках, столбцах и квадратах 3х3 всех сеток
+            # (общие квадраты пересекающихся сеток учитываются один раз)
+            for group in units:
                 for k in range(1, 10):
-                    if choices[n][i][j][k].value() == 1:
-                        solutions[n][i][j] = k
-                        break
-
-    return [arr, solutions, pos_arr]
+                    prob += lpSum([choices[cell][k] for cell in group]) == 1
+
+            # ввод изначальных значений - границами переменных, а не ограничениями
+            for num, grid in enumerate(data):
+                for i in range(9):
+                    for j in range(9):
+                        k = grid['arr'][i][j]
+                        if k != 0:
+                            choices[grid_cells[num][i][j]][k].lowBound = 1
+            profiling.count('variables', len(cells) * 9)
+            profiling.count('constraints', len(prob.constraints))
+            profiling.count('nonzeros', 9 * len(cells) + 9 * sum(len(group) for group in units))
+
+        # решатель (control - ограничения времени, разрыва и потоков, см. utils/solver_control.py)
+        with profiling.span('solve'):
+            control = control or SolverControl(msg=True)
+            control.solve(prob)
+            profiling.count('bb_nodes', control.nodes or 0)
+
+        # проверка наличия решения
+        if LpStatus[prob.status] != "Optimal":
+            print("ERROR")
+            return [arr, [], pos_arr]
+
+        # преобразование решения для отображения
+        with profiling.span('extract'):
+            solutions = [[[0 for _ in range(9)] for _ in range(9)] for _ in range(len(data))]
+            for n in range(len(data)):
+                for i in range(9):
+                    for j in range(9):
+                        for k in range(1, 10):
+                            if choices[grid_cells[n][i][j]][k].value() == 1:
+                                solutions[n][i][j] = k
+                                break
+
+        return [arr, solutions, pos_arr]
 
 
 # вывод исходного судоку и решения
@@ -119,16 +113,20 @@ def dispay(solution):
 
 
 # главная функция
-def main():
-    solutions = []
+def main(solver=solve_native, workers=None):
     with open("data.json", "r") as file:
         data = json.loads(file.read())
-        for name, s_data in data.items():
-            print(f'\n\n{name}')
-            solutions.append(solve(s_data))
-        for name, _ in data.items():
-            print(f'\n\n{name}')
-            dispay(solutions.pop(0))
+
+    # решения выводятся по мере готовности
+    latencies = []
+    start = perf_counter()
+    for name, solution, latency in solve_batch(data, solver, workers):
+        print(f'\n\n{name}')
+        with profiling.span('render'):
+            dispay(solution)
+        latencies.append(latency)
+    if latencies:
+        show_summary(summary(latencies, perf_counter() - start))
 
 
 if __name__ == '__main__':
@@ -1,3 +1,4 @@
+from collections import deque
 
 
 class Graph:
@@ -18,18 +19,20 @@ class Graph:
             True if an augmenting path is found, False otherwise.
         """
         visited = [False] * self.ROW
-        queue = [s]
+        queue = deque([s])
         visited[s] = True
 
         while queue:
-            u = queue.pop(0)
+            u = queue.popleft()
             for ind, val in enumerate(self.graph[u]):
-                if visited[ind] == False and val > 0:
+                if not visited[ind] and val > 0:
                     queue.append(ind)
                     visited[ind] = True
                     parent[ind] = u
+                    if ind == t:
+                        return True
 
-        return True if visited[t] else False
+        return False
 
     def FordFulkerson(self, source, sink):
         """
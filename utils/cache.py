@@ -0,0 +1,293 @@
+"""
+Solution cache in front of the task entry points.
+
+A decorated solver hashes a canonical form of its arguments (array dtype,
+shape and bytes, sparse matrices in sorted CSR form, mappings with sorted
+keys, graphs as sorted node and edge lists, solver options) and returns the
+stored result when the same instance was solved before::
+
+    from utils import cache
+
+    @cache.cached('t1.solve_transport')
+    def solve_transport(cost, supply, demand, start='vogel', max_iter=None):
+        ...
+
+The cache is off until it is switched on, so solver callbacks, profiling
+spans and reports run as usual by default::
+
+    cache.configure(enabled=True)
+
+Results are kept pickled, so every hit returns a fresh copy the caller may
+modify. The memory tier is an LRU bounded by the total size of the pickled
+results; the optional SQLite tier survives restarts and is shared between
+processes::
+
+    cache.configure(max_bytes=256 * 2 ** 20, path='solutions.sqlite')
+    ...
+    cache.default.stats()  # {'hits': ..., 'misses': ..., ...}
+
+A hit skips the solver body, so it emits no phase spans; instead it is
+recorded as a span named after the cached function with a ``cache_hit``
+counter. Calls that need the solver to run (a progress callback, a
+printed report) are excluded with ``bypass``.
+
+Keys depend only on the arguments and the name given to ``cached``, so the
+disk tier has to be cleared after changing a solver.
+"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Set
+
+import numpy as np
+from scipy import sparse
+
+from . import profiling
+
+
+def _feed(h, value):
+    if value is None or isinstance(value, (bool, int, float, complex, str)):
+        h.update(f'{type(value).__name__}:{value!r};'.encode())
+    elif isinstance(value, bytes):
+        h.update(b'bytes:%d:' % len(value) + value)
+    elif isinstance(value, (np.ndarray, np.generic)):
+        _feed_array(h, np.asarray(value))
+    elif sparse.issparse(value):
+        matrix = sparse.csr_matrix(value, copy=True)
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+        h.update(b'sparse:' + struct.pack('<2q', *matrix.shape))
+        for part in (matrix.data, matrix.indices, matrix.indptr):
+            _feed_array(h, part)
+    elif isinstance(value, Mapping):
+        h.update(b'map:%d{' % len(value))
+        for key, item in sorted(((_digest(key), item) for key, item in value.items()), key=lambda pair: pair[0]):
+            h.update(key)
+            _feed(h, item)
+        h.update(b'}')
+    elif isinstance(value, Set):
+        h.update(b'set:%d{' % len(value) + b''.join(sorted(_digest(item) for item in value)) + b'}')
+    elif isinstance(value, (list, tuple)):
+        _feed_sequence(h, value)
+    elif hasattr(value, 'cache_key'):
+        h.update(f'{type(value).__name__}.cache_key:'.encode())
+        _feed(h, value.cache_key())
+    elif hasattr(value, 'is_directed') and hasattr(value, 'edges'):
+        # networkx-like graph: nodes and edges with their attributes, order-independent
+        nodes = {_digest(node): data for node, data in value.nodes(data=True)}
+        if value.is_directed():
+            edges = {_digest((u, v)): data for u, v, data in value.edges(data=True)}
+        else:
+            edges = {b''.join(sorted((_digest(u), _digest(v)))): data for u, v, data in value.edges(data=True)}
+        h.update(f'graph:{type(value).__name__}:'.encode())
+        _feed(h, [sorted(nodes.items(), key=lambda pair: pair[0]), sorted(edges.items(), key=lambda pair: pair[0])])
+    else:
+        raise TypeError(f'no canonical form for {type(value).__name__}; give it a cache_key() method')
+
+
+def _feed_array(h, array):
+    array = np.ascontiguousarray(array)
+    if array.dtype.hasobject:
+        _feed_sequence(h, array.tolist())
+        return
+    h.update(f'array:{array.dtype.str}:{array.shape};'.encode())
+    h.update(array.data)
+
+
+def _feed_sequence(h, value):
+    # numeric nested lists (matrices from data.json) are hashed as one array
+    if value and isinstance(value[0], (int, float, list, tuple, np.ndarray)):
+        try:
+            array = np.asarray(value)
+        except ValueError:  # ragged nested lists
+            array = None
+        if array is not None and array.dtype.kind in 'biuf':
+            _feed_array(h, array)
+            return
+    h.update(b'seq:%d[' % len(value))
+    for item in value:
+        _feed(h, item)
+    h.update(b']')
+
+
+def _digest(value):
+    h = hashlib.blake2b(digest_size=16)
+    _feed(h, value)
+    return h.digest()
+
+
+def instance_key(*parts):
+    """Hex digest of the canonical form of ``parts``."""
+    return _digest(parts).hex()
+
+
+class SolutionCache:
+    """
+    Two-tier cache of pickled results.
+
+    Args:
+        max_bytes: size budget of the in-memory LRU tier (pickled bytes).
+        path: SQLite file of the persistent tier, None to keep results in memory only.
+        enabled: when False ``cached`` functions call straight through.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20, path=None, enabled=True):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+
+    def _connection(self):
+        # one connection per process: pool workers must not share the parent's
+        if self.path is None:
+            return None
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, value BLOB)')
+            self._db.commit()
+            self._pid = os.getpid()
+        return self._db
+
+    def _remember(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._memory[key] = blob
+        self._size += len(blob)
+        while self._size > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def _lookup(self, key):
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return blob
+            db = self._connection()
+            if db is not None:
+                row = db.execute('SELECT value FROM solutions WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    blob = row[0]
+                    self._remember(key, blob)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return blob
+            self.misses += 1
+            return None
+
+    def get(self, key, default=None):
+        blob = self._lookup(key)
+        return default if blob is None else pickle.loads(blob)
+
+    def put(self, key, value):
+        """Stores ``value``; returns False if it cannot be pickled (it is then not cached)."""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        with self._lock:
+            self._remember(key, blob)
+            db = self._connection()
+            if db is not None:
+                db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?)', (key, blob))
+                db.commit()
+        return True
+
+    def clear(self, disk=True):
+        with self._lock:
+            self._memory.clear()
+            self._size = 0
+            db = self._connection() if disk else None
+            if db is not None:
+                db.execute('DELETE FROM solutions')
+                db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._memory),
+            'bytes': self._size,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+default = SolutionCache(enabled=False)
+
+
+def configure(max_bytes=64 * 2 ** 20, path=None, enabled=True):
+    """Replaces the shared cache used by ``cached`` functions and returns it."""
+    global default
+    default.close()
+    default = SolutionCache(max_bytes, path, enabled)
+    return default
+
+
+def cached(name, ignore=(), bypass=None):
+    """
+    Decorator putting a solver behind the shared cache.
+
+    Args:
+        name: stable key prefix; module names differ between scripts and
+            the benchmark loader, so it is given explicitly.
+        ignore: parameters that do not change the result (worker counts,
+            assembly variants, report flags).
+        bypass: ``bypass(arguments)`` -> True for calls that must run the
+            solver, e.g. when a callback or a report is requested.
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = default
+            if not store.enabled:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if bypass is not None and bypass(bound.arguments):
+                return func(*args, **kwargs)
+            arguments = {key: item for key, item in bound.arguments.items() if key not in ignore}
+            try:
+                key = instance_key(name, arguments)
+            except TypeError:  # an argument without canonical form, e.g. a bare callback
+                return func(*args, **kwargs)
+            blob = store._lookup(key)
+            if blob is not None:
+                with profiling.span(name):
+                    profiling.count('cache_hit')
+                    return pickle.loads(blob)
+            result = func(*args, **kwargs)
+            store.put(key, result)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,60 @@
+from time import perf_counter
+
+import pulp
+
+
+class CuttingPlane:
+    """
+    Lazy constraint generation around a ``pulp.LpProblem``.
+
+    The problem is solved with the constraints it currently has, then the
+    separation callback inspects the solution and returns the constraints it
+    violates. They are added and the problem is solved again, until the
+    callback finds nothing (or the iteration limit is hit).
+
+    Args:
+        prob: the model, built without the lazy family of constraints.
+        separate: callable ``separate(prob) -> list of pulp constraints``
+            violated by the current solution.
+        solver: pulp solver instance, CBC without output by default.
+        max_iterations: upper bound on solve/separate rounds.
+    """
+
+    def __init__(self, prob, separate, solver=None, max_iterations=1000):
+        self.prob = prob
+        self.separate = separate
+        self.solver = solver or pulp.PULP_CBC_CMD(msg=False)
+        self.max_iterations = max_iterations
+        self.history = []
+
+    def solve(self):
+        """Runs the loop and returns the final pulp status code."""
+        for iteration in range(1, self.max_iterations + 1):
+            start = perf_counter()
+            self.prob.solve(self.solver)
+            solved = perf_counter()
+
+            optimal = pulp.LpStatus[self.prob.status] == "Optimal"
+            cuts = list(self.separate(self.prob)) if optimal else []
+            separated = perf_counter()
+
+            for cut in cuts:
+                self.prob += cut
+            self.history.append({
+                'iteration': iteration,
+                'solve_time': solved - start,
+                'separation_time': separated - solved,
+                'added': len(cuts),
+                'constraints': len(self.prob.constraints),
+                'objective': pulp.value(self.prob.objective) if optimal else None,
+            })
+            if not cuts:
+                break
+        return self.prob.status
+
+    def report(self):
+        """Prints one line per iteration."""
+        print(f"{'iter':>4} {'solve, s':>9} {'sep, s':>8} {'added':>6} {'rows':>6}  objective")
+        for row in self.history:
+            print(f"{row['iteration']:>4} {row['solve_time']:>9.3f} {row['separation_time']:>8.3f} "
+                  f"{row['added']:>6} {row['constraints']:>6}  {row['objective']}")
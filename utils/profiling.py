@@ -0,0 +1,141 @@
+"""
+Phase-level instrumentation for the task entry points.
+
+Code is marked up with nested spans and counters::
+
+    from utils import profiling
+
+    with profiling.span('t3.optimize'):
+        with profiling.span('build'):
+            ...
+            profiling.count('variables', len(c_obj))
+
+Nothing is recorded until at least one sink is enabled; in that state
+``span`` returns a shared no-op context manager and ``count`` returns
+immediately, so instrumented code pays one function call per site. Each
+finished span is passed to every sink as a dict with keys ``name`` (the
+``/``-joined path of nested spans), ``start``, ``duration`` and
+``counters``.
+
+    collector = profiling.MemorySink()
+    profiling.enable(collector, profiling.LogSink())
+    ...
+    profiling.disable()
+"""
+import json
+import logging
+import threading
+from time import perf_counter
+
+_sinks = []
+_local = threading.local()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name):
+        self.name = name
+        self.counters = {}
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.path = f'{stack[-1].path}/{self.name}' if stack else self.name
+        stack.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = perf_counter() - self.start
+        _local.stack.pop()
+        record = {'name': self.path, 'start': self.start, 'duration': duration, 'counters': self.counters}
+        for sink in _sinks:
+            sink(record)
+        return False
+
+
+def enable(*sinks):
+    """Starts recording into the given sinks (callables taking a record dict)."""
+    _sinks.extend(sinks)
+
+
+def disable():
+    """Stops recording and detaches all sinks."""
+    _sinks.clear()
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def span(name):
+    """Context manager timing one phase; nested spans get ``parent/child`` names."""
+    if not _sinks:
+        return _NULL
+    return _Span(name)
+
+
+def count(name, value=1):
+    """Adds ``value`` to the counter ``name`` of the innermost open span."""
+    if not _sinks:
+        return
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        counters = stack[-1].counters
+        counters[name] = counters.get(name, 0) + value
+
+
+class LogSink:
+    """One log line per span through the standard ``logging`` module."""
+
+    def __init__(self, logger='profiling', level=logging.INFO):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level = level
+
+    def __call__(self, record):
+        counters = ' '.join(f'{key}={value}' for key, value in record['counters'].items())
+        self.logger.log(self.level, f"{record['name']} {record['duration'] * 1000:.3f} ms {counters}".rstrip())
+
+
+class JsonSink:
+    """Appends one JSON object per span to a file (JSON lines)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=float)
+        with self._lock, open(self.path, 'a') as file:
+            file.write(line + '\n')
+
+
+class MemorySink:
+    """Keeps records in memory, e.g. for tests or the benchmark harness."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records = []
+
+    def totals(self):
+        """Total duration per span name."""
+        totals = {}
+        for record in self.records:
+            totals[record['name']] = totals.get(record['name'], 0.0) + record['duration']
+        return totals
@@ -0,0 +1,80 @@
+"""
+Optional visualisation stage for the task scripts.
+
+Solvers return plain data; drawing is a separate step, and graphviz and
+pyvis are imported only when something is actually drawn, so importing a
+solver stays light and headless runs never touch them.
+
+Edges are passed as ``(u, v, weight, attrs)`` tuples, where ``attrs`` are
+the drawing attributes (``label``, ``color``). Drawing an N^2-edge graph
+takes far longer than solving it, so graphs with more than ``max_edges``
+edges (``MAX_EDGES`` by default) are skipped. They can be reduced first to
+edges with a nonzero weight (``nonzero=True``, e.g. arcs carrying flow),
+then to the ``top_k`` heaviest ones.
+"""
+import heapq
+
+MAX_EDGES = 300
+
+
+def select(edges, max_edges=None, top_k=None, nonzero=False):
+    """The edges to draw, or None if there are still more than ``max_edges``."""
+    edges = list(edges)
+    if nonzero:
+        edges = [edge for edge in edges if edge[2]]
+    if top_k is not None and len(edges) > top_k:
+        edges = heapq.nlargest(top_k, edges, key=lambda edge: abs(edge[2]))
+    limit = MAX_EDGES if max_edges is None else max_edges
+    if len(edges) > limit:
+        return None
+    return edges
+
+
+def _skipped(name, count, max_edges):
+    limit = MAX_EDGES if max_edges is None else max_edges
+    print(f"render: '{name}' skipped, {count} edges > {limit} (use top_k or nonzero)")
+
+
+def graphviz(name, nodes, edges, directory='d_render', view=True, max_edges=None, top_k=None, nonzero=False):
+    """Renders a directed graph with graphviz; returns the output path or None if skipped."""
+    edges = list(edges)
+    chosen = select(edges, max_edges, top_k, nonzero)
+    if chosen is None:
+        _skipped(name, len(edges), max_edges)
+        return None
+
+    import graphviz as gz
+
+    graph = gz.Digraph(name)
+    for node in nodes:
+        graph.node(node)
+    for u, v, _, attrs in chosen:
+        graph.edge(u, v, **attrs)
+    return graph.render(directory=directory, view=view)
+
+
+def pyvis(path, nodes, edges, directed=False, height='900px', spring_length=None,
+          max_edges=None, top_k=None, nonzero=False):
+    """
+    Writes a pyvis HTML page and opens it; returns the path or None if skipped.
+
+    ``nodes`` is an iterable of node ids or a mapping id -> label.
+    """
+    edges = list(edges)
+    chosen = select(edges, max_edges, top_k, nonzero)
+    if chosen is None:
+        _skipped(path, len(edges), max_edges)
+        return None
+
+    from pyvis.network import Network
+
+    net = Network(directed=directed, height=height, width="100%")
+    labels = nodes if hasattr(nodes, 'items') else {node: str(node) for node in nodes}
+    for node, label in labels.items():
+        net.add_node(node, label=label)
+    for u, v, _, attrs in chosen:
+        net.add_edge(u, v, **attrs)
+    if spring_length is not None:
+        net.options.physics.springLength = spring_length
+    net.show(path, notebook=False)
+    return path
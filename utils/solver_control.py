@@ -0,0 +1,177 @@
+import os
+import re
+import tempfile
+import threading
+from time import perf_counter, sleep
+
+import pulp
+
+try:
+    import highspy
+except ImportError:  # only CBC is available then
+    highspy = None
+
+
+# CBC log lines carrying a new incumbent and/or bound
+_CBC_PATTERNS = [
+    re.compile(r'(?P<objective>\S+) best solution, best possible (?P<bound>\S+)'),
+    re.compile(r'Integer solution of (?P<objective>\S+)'),
+    re.compile(r'Solution found of (?P<objective>\S+)'),
+    re.compile(r'best possible (?P<bound>\S+)'),
+]
+_CBC_NODES = re.compile(r'Enumerated nodes:\s+(\d+)')
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class SolverControl:
+    """
+    Bounded-latency MILP solving for ``pulp.LpProblem``.
+
+    Wraps the CBC or HiGHS backend with a wall-clock budget, a relative MIP
+    gap and a thread count. While the solver runs, every new incumbent or
+    bound is passed to ``callback`` as a dict with keys ``time``,
+    ``objective`` and ``bound`` (in the sense of the problem, so maximisation
+    problems get positive profits back). When the budget runs out the solver
+    stops and pulp loads the best feasible solution found so far.
+
+    Args:
+        time_limit: wall-clock budget in seconds, None for no limit.
+        gap: relative MIP gap at which the search stops.
+        threads: number of solver threads.
+        backend: ``'cbc'`` or ``'highs'`` (falls back to CBC without highspy).
+        callback: callable ``callback(event)`` for incumbent/bound updates.
+        msg: show the solver log.
+    """
+
+    def __init__(self, time_limit=None, gap=None, threads=None, backend='cbc', callback=None, msg=False):
+        self.time_limit = time_limit
+        self.gap = gap
+        self.threads = threads
+        self.backend = backend if backend != 'highs' or highspy is not None else 'cbc'
+        self.callback = callback
+        self.msg = msg
+        self.events = []
+        self.elapsed = None
+        self.nodes = None  # branch-and-bound nodes of the last solve
+        self._start = perf_counter()
+        self._log_path = None
+
+    def _emit(self, sign, objective=None, bound=None):
+        event = {
+            'time': perf_counter() - self._start,
+            'objective': None if objective is None else sign * objective,
+            'bound': None if bound is None else sign * bound,
+        }
+        self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    def solver(self, sign=1):
+        """The configured pulp solver; ``sign`` turns the solver's objective into the problem's."""
+        if self.backend == 'highs':
+            callback_tuple, callbacks = None, None
+            if self.callback is not None:
+                def on_event(callback_type, message, data_out, data_in, user_data):
+                    incumbent = data_out.objective_function_value
+                    self._emit(sign, incumbent if abs(incumbent) < highspy.kHighsInf else None,
+                               data_out.mip_dual_bound)
+
+                callback_tuple = (on_event, None)
+                callbacks = [highspy.cb.HighsCallbackType.kCallbackMipImprovingSolution,
+                             highspy.cb.HighsCallbackType.kCallbackMipLogging]
+            return pulp.HiGHS(msg=self.msg, timeLimit=self.time_limit, gapRel=self.gap, threads=self.threads,
+                              callbackTuple=callback_tuple, callbacksToActivate=callbacks)
+
+        # with a log file CBC writes there instead of stdout; _tail echoes it
+        return pulp.PULP_CBC_CMD(msg=self.msg and self._log_path is None, timeLimit=self.time_limit, gapRel=self.gap,
+                                 threads=self.threads, logPath=self._log_path)
+
+    def _tail(self, path, sign, stop):
+        # CBC writes its log to a file; follow it as it grows (and echo it if msg)
+        with open(path, 'a+') as log:
+            log.seek(0)
+            buffer = ''
+            while True:
+                chunk = log.read()
+                if chunk:
+                    buffer += chunk
+                    *lines, buffer = buffer.split('\n')
+                    for line in lines:
+                        self._parse(line, sign)
+                elif stop.is_set():
+                    break
+                else:
+                    sleep(0.02)
+            if buffer:
+                self._parse(buffer, sign)
+
+    def _parse(self, line, sign):
+        if self.msg:
+            print(line)
+        nodes = _CBC_NODES.search(line)
+        if nodes:
+            self.nodes = int(nodes.group(1))
+        if self.callback is None:
+            return
+        for pattern in _CBC_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                groups = match.groupdict()
+                objective = _number(groups.get('objective', ''))
+                bound = _number(groups.get('bound', ''))
+                if objective is not None or bound is not None:
+                    self._emit(sign, objective, bound)
+                return
+
+    def solve(self, prob):
+        """Solves ``prob`` in place and returns the pulp status code."""
+        # both backends minimise internally
+        sign = -1 if prob.sense == pulp.LpMaximize else 1
+        self.events = []
+        self.nodes = None
+        self._start = perf_counter()
+
+        if self.backend == 'cbc':
+            handle, self._log_path = tempfile.mkstemp(suffix='.log')
+            os.close(handle)
+            stop = threading.Event()
+            reader = threading.Thread(target=self._tail, args=(self._log_path, sign, stop), daemon=True)
+            reader.start()
+            try:
+                prob.solve(self.solver(sign))
+            finally:
+                stop.set()
+                reader.join()
+                os.remove(self._log_path)
+                self._log_path = None
+        else:
+            prob.solve(self.solver(sign))
+            self.nodes = prob.solverModel.getInfo().mip_node_count
+
+        self.elapsed = perf_counter() - self._start
+        return prob.status
+
+    def cache_key(self):
+        """The limits that can change the returned solution (for utils/cache.py)."""
+        return self.backend, self.time_limit, self.gap, self.threads
+
+    def milp_options(self):
+        """The same limits as ``options`` for ``scipy.optimize.milp`` (HiGHS, no callbacks)."""
+        options = {'disp': self.msg}
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+        if self.gap is not None:
+            options['mip_rel_gap'] = self.gap
+        return options
+
+
+def has_callback(arguments):
+    """``bypass`` for utils/cache.py: a call whose ``control`` has a callback runs the solver."""
+    control = arguments.get('control')
+    return control is not None and control.callback is not None